@@ -1,16 +1,319 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.datastructures import Headers, MutableHeaders
 from motor.motor_asyncio import AsyncIOMotorClient
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from pymongo import ASCENDING, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from bson import Binary
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any, Tuple
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from collections import OrderedDict
 import os
+import sys
+import threading
+import time
+import random
 import aiohttp
 import asyncio
-from datetime import datetime, timedelta
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse, parse_qsl
+from email.utils import format_datetime, parsedate_to_datetime
+import base64
+import bisect
+import warnings
+import functools
+import hashlib
+import hmac
 import json
+import math
+import orjson
+import socket
+import uuid
 from enum import Enum
 
-app = FastAPI(title="StrandWetter Deutschland API", version="1.0.0")
+# Open-Meteo endpoints; overridable to point at a local stand-in
+FORECAST_API_URL = os.environ.get('FORECAST_API_URL', 'https://api.open-meteo.com/v1/forecast')
+MARINE_API_URL = os.environ.get('MARINE_API_URL', 'https://marine-api.open-meteo.com/v1/marine')
+
+# Upstream HTTP client configuration
+UPSTREAM_LIMIT = int(os.environ.get('UPSTREAM_LIMIT', '100'))
+UPSTREAM_LIMIT_PER_HOST = int(os.environ.get('UPSTREAM_LIMIT_PER_HOST', '20'))
+UPSTREAM_KEEPALIVE_TIMEOUT = float(os.environ.get('UPSTREAM_KEEPALIVE_TIMEOUT', '60'))
+UPSTREAM_DNS_CACHE_TTL = int(os.environ.get('UPSTREAM_DNS_CACHE_TTL', '300'))
+UPSTREAM_CONNECT_TIMEOUT = float(os.environ.get('UPSTREAM_CONNECT_TIMEOUT', '5'))
+UPSTREAM_READ_TIMEOUT = float(os.environ.get('UPSTREAM_READ_TIMEOUT', '10'))
+UPSTREAM_TOTAL_TIMEOUT = float(os.environ.get('UPSTREAM_TOTAL_TIMEOUT', '15'))
+
+# Upstream resilience: retries, circuit breaker and client-side rate limit per host
+UPSTREAM_RETRIES = int(os.environ.get('UPSTREAM_RETRIES', '2'))
+UPSTREAM_BACKOFF_BASE = float(os.environ.get('UPSTREAM_BACKOFF_BASE', '0.2'))
+UPSTREAM_BACKOFF_MAX = float(os.environ.get('UPSTREAM_BACKOFF_MAX', '2'))
+# Budget for all attempts of one upstream call, kept below BEACH_FETCH_TIMEOUT so retries end before callers give up
+UPSTREAM_DEADLINE = float(os.environ.get('UPSTREAM_DEADLINE', '18'))
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', '5'))
+CIRCUIT_RESET_TIMEOUT = float(os.environ.get('CIRCUIT_RESET_TIMEOUT', '30'))
+# Requests per second per host; 0 disables the limiter
+UPSTREAM_RATE_LIMIT = float(os.environ.get('UPSTREAM_RATE_LIMIT', '10'))
+UPSTREAM_RATE_BURST = int(os.environ.get('UPSTREAM_RATE_BURST', '20'))
+
+# Fan-out configuration for multi-beach endpoints
+FETCH_CONCURRENCY = int(os.environ.get('FETCH_CONCURRENCY', '8'))
+BEACH_FETCH_TIMEOUT = float(os.environ.get('BEACH_FETCH_TIMEOUT', '20'))
+# Locations per batched Open-Meteo request; 1 disables batching
+UPSTREAM_BATCH_SIZE = int(os.environ.get('UPSTREAM_BATCH_SIZE', '50'))
+
+# Snapshot freshness and background refresh configuration
+WEATHER_CACHE_TTL = int(os.environ.get('WEATHER_CACHE_TTL', '1800'))
+# Marine data is cached separately and only fetched when a response needs it
+MARINE_CACHE_TTL = int(os.environ.get('MARINE_CACHE_TTL', '10800'))
+SNAPSHOT_MAX_STALENESS = int(os.environ.get('SNAPSHOT_MAX_STALENESS', '21600'))
+REFRESH_SCHEDULER_ENABLED = os.environ.get('REFRESH_SCHEDULER_ENABLED', 'true').lower() == 'true'
+REFRESH_AHEAD_RATIO = float(os.environ.get('REFRESH_AHEAD_RATIO', '0.8'))
+REFRESH_JITTER = float(os.environ.get('REFRESH_JITTER', '60'))
+REFRESH_TICK = float(os.environ.get('REFRESH_TICK', '15'))
+L1_MAX_ENTRIES = int(os.environ.get('L1_MAX_ENTRIES', '10000'))
+# How long recommendations on a cold worker wait for the initial load before answering with what is ranked
+RECOMMENDATIONS_WARMUP_WAIT = float(os.environ.get('RECOMMENDATIONS_WARMUP_WAIT', '2'))
+
+# Model-run-aware freshness: forecasts stay fresh until the upstream models publish a new run.
+# Without model metadata the plain WEATHER_CACHE_TTL applies.
+MODEL_META_URLS = [
+    url.strip() for url in os.environ.get(
+        'MODEL_META_URLS',
+        'https://api.open-meteo.com/data/dwd_icon_d2/static/meta.json,'
+        'https://api.open-meteo.com/data/dwd_icon_eu/static/meta.json'
+    ).split(',') if url.strip()
+]
+MODEL_META_POLL = float(os.environ.get('MODEL_META_POLL', '300'))
+MODEL_REFRESH_MAX_AGE = int(os.environ.get('MODEL_REFRESH_MAX_AGE', '10800'))
+
+# Cross-worker refresh coordination: one worker per cell holds a Mongo lease while it refreshes
+REFRESH_LEASE_SECONDS = float(os.environ.get('REFRESH_LEASE_SECONDS', '30'))
+REFRESH_LEASE_WAIT = float(os.environ.get('REFRESH_LEASE_WAIT', '3'))
+REFRESH_LEASE_POLL = float(os.environ.get('REFRESH_LEASE_POLL', '0.25'))
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Server-Sent Events configuration
+SSE_HEARTBEAT_INTERVAL = float(os.environ.get('SSE_HEARTBEAT_INTERVAL', '15'))
+SSE_QUEUE_SIZE = int(os.environ.get('SSE_QUEUE_SIZE', '16'))
+
+# Beaches per streamed batch request
+WEATHER_BATCH_MAX_BEACHES = int(os.environ.get('WEATHER_BATCH_MAX_BEACHES', '1000'))
+
+# In-process metrics, exposed in Prometheus text format on /metrics
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SCORING_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+def format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    """Render a Prometheus label set, escaping backslashes and quotes in values"""
+    pairs = [
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    """Monotonic counter per label set"""
+    kind = "counter"
+    
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.values: Dict[tuple, float] = {}
+    
+    def inc(self, *label_values: str, amount: float = 1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+    
+    def render(self) -> List[str]:
+        return [f"{self.name}{format_labels(self.labels, key)} {value}" for key, value in self.values.items()]
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+    kind = "gauge"
+    
+    def dec(self, *label_values: str, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+class Histogram:
+    """Cumulative-bucket histogram per label set; observe() is one bisect and three adds"""
+    kind = "histogram"
+    
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        # Per label set: [count per bucket (last is +Inf), sum]
+        self.values: Dict[tuple, list] = {}
+    
+    def observe(self, value: float, *label_values: str):
+        series = self.values.get(label_values)
+        if series is None:
+            series = self.values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+    
+    def render(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bound_label = 'le="{}"'.format(le)
+                lines.append(f"{self.name}_bucket{format_labels(self.labels, key, bound_label)} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+HTTP_REQUESTS = Counter("strandwetter_http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+HTTP_LATENCY = Histogram("strandwetter_http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+HTTP_IN_FLIGHT = Gauge("strandwetter_http_requests_in_flight", "HTTP requests currently being served")
+UPSTREAM_REQUESTS = Counter("strandwetter_upstream_requests_total", "Open-Meteo requests by host and status", ("host", "status"))
+UPSTREAM_LATENCY = Histogram("strandwetter_upstream_request_duration_seconds", "Open-Meteo request latency by host", ("host",))
+MONGO_CACHE_LOOKUPS = Counter("strandwetter_mongo_cache_lookups_total", "Mongo snapshot cache lookups per cell", ("result",))
+REFRESH_RESULTS = Counter("strandwetter_refresh_results_total", "Refreshed cells by whether upstream data changed", ("result",))
+REFRESH_COORDINATION = Counter("strandwetter_refresh_coordination_total", "Cross-worker refresh outcomes per cell", ("kind", "outcome"))
+SCORING_LATENCY = Histogram("strandwetter_scoring_duration_seconds", "Time to score one batch of forecasts", buckets=SCORING_BUCKETS)
+METRICS = [HTTP_REQUESTS, HTTP_LATENCY, HTTP_IN_FLIGHT, UPSTREAM_REQUESTS, UPSTREAM_LATENCY, MONGO_CACHE_LOOKUPS,
+           REFRESH_COORDINATION, REFRESH_RESULTS, SCORING_LATENCY]
+
+class StageTimings(dict):
+    """Milliseconds per stage, counting the wall time during which any span of the stage was open.
+
+    Spans of one stage often run concurrently (parallel upstream calls, forecast and
+    marine loads under gather); summing them would report more time than the request took.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self.open: Dict[str, int] = {}
+        self.opened_at: Dict[str, float] = {}
+    
+    def enter(self, stage: str):
+        if not self.open.get(stage):
+            self.opened_at[stage] = time.perf_counter()
+        self.open[stage] = self.open.get(stage, 0) + 1
+    
+    def exit(self, stage: str):
+        self.open[stage] -= 1
+        if not self.open[stage]:
+            self[stage] = self.get(stage, 0.0) + (time.perf_counter() - self.opened_at[stage]) * 1000
+
+# Per-request stage timings, reported through the Server-Timing header.
+# Background refresh tasks inherit the timings of the request that started them.
+request_timings: ContextVar[Optional[StageTimings]] = ContextVar("request_timings", default=None)
+
+@contextmanager
+def timed(stage: str):
+    """Add the time spent in a block to the current request's stage timings"""
+    timings = request_timings.get()
+    if timings is None:
+        yield
+        return
+    timings.enter(stage)
+    try:
+        yield
+    finally:
+        timings.exit(stage)
+
+# Opt-in sampling profiler; disabled unless an admin token is configured
+PROFILE_ADMIN_TOKEN = os.environ.get('PROFILE_ADMIN_TOKEN', '')
+PROFILE_SAMPLE_INTERVAL = float(os.environ.get('PROFILE_SAMPLE_INTERVAL', '0.001'))
+
+class StackSampler:
+    """Sample the event loop thread's Python stack and count collapsed stacks"""
+    
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Dict[str, int] = {}
+        self.samples = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="stack-sampler", daemon=True)
+    
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+                frame = frame.f_back
+            key = ";".join(reversed(stack))
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+    
+    def start(self):
+        self.thread.start()
+    
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+    
+    def collapsed(self) -> str:
+        """Folded stacks, one per line with its sample count, ready for flamegraph tools"""
+        ordered = sorted(self.stacks.items(), key=lambda item: item[1], reverse=True)
+        return "".join(f"{stack} {count}\n" for stack, count in ordered)
+
+# Shared upstream session, created in the app lifespan
+http_session: Optional[aiohttp.ClientSession] = None
+
+def create_http_session() -> aiohttp.ClientSession:
+    """Create the pooled aiohttp session used for all Open-Meteo requests"""
+    connector = aiohttp.TCPConnector(
+        limit=UPSTREAM_LIMIT,
+        limit_per_host=UPSTREAM_LIMIT_PER_HOST,
+        keepalive_timeout=UPSTREAM_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=UPSTREAM_DNS_CACHE_TTL,
+        use_dns_cache=True,
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=UPSTREAM_TOTAL_TIMEOUT,
+        sock_connect=UPSTREAM_CONNECT_TIMEOUT,
+        sock_read=UPSTREAM_READ_TIMEOUT,
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Return the shared upstream session, creating it if the lifespan has not run"""
+    global http_session
+    if http_session is None or http_session.closed:
+        http_session = create_http_session()
+    return http_session
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global http_session
+    http_session = create_http_session()
+    await ensure_indexes()
+    scheduler_task = asyncio.create_task(refresh_scheduler()) if REFRESH_SCHEDULER_ENABLED else None
+    try:
+        yield
+    finally:
+        if scheduler_task:
+            scheduler_task.cancel()
+            await asyncio.gather(
+                scheduler_task, *weather_cache.inflight.values(), *marine_cache.inflight.values(), return_exceptions=True
+            )
+        await http_session.close()
+        # Give the connector a moment to close keep-alive TLS transports
+        await asyncio.sleep(0.25)
+        http_session = None
+
+app = FastAPI(
+    title="StrandWetter Deutschland API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
 
 # CORS configuration
 app.add_middleware(
@@ -21,22 +324,319 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses; small ones are not worth the CPU
+GZIP_MINIMUM_SIZE = int(os.environ.get('GZIP_MINIMUM_SIZE', '1024'))
+# Streaming endpoints must not be compressed, gzip would hold events back until close
+UNCOMPRESSED_PATHS = ("/api/stream", "/api/weather/batch")
+
+class StreamAwareGZipMiddleware(GZipMiddleware):
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(UNCOMPRESSED_PATHS):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+app.add_middleware(StreamAwareGZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)
+
+class MetricsMiddleware:
+    """Record latency, status and in-flight count per route template"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        status = "500"
+        
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+        
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            # Label by route template, not raw path, to keep cardinality bounded
+            route = getattr(scope.get("route"), "path", None) or ROUTE_TEMPLATES.get(scope.get("endpoint"), "unmatched")
+            HTTP_LATENCY.observe(time.perf_counter() - started, scope["method"], route)
+            HTTP_REQUESTS.inc(scope["method"], route, status)
+
+# Endpoint function -> route template, filled once all routes are registered
+ROUTE_TEMPLATES: Dict[Any, str] = {}
+
+app.add_middleware(MetricsMiddleware)
+
+def format_server_timing(timings: Dict[str, float]) -> str:
+    return ", ".join(f"{stage};dur={duration:.2f}" for stage, duration in timings.items())
+
+def profile_requested(scope) -> bool:
+    """Profiling needs the admin token, as X-Profile header or debug_profile query parameter"""
+    if not PROFILE_ADMIN_TOKEN:
+        return False
+    token = Headers(scope=scope).get("x-profile")
+    if token is None:
+        token = dict(parse_qsl(scope.get("query_string", b"").decode())).get("debug_profile")
+    return token is not None and hmac.compare_digest(token, PROFILE_ADMIN_TOKEN)
+
+class ServerTimingMiddleware:
+    """Report stage timings in a Server-Timing header and serve sampled profiles on request"""
+    
+    def __init__(self, app):
+        self.app = app
+        self.profiling = False
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        timings = StageTimings()
+        token = request_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            # One profile at a time; the sampler sees the whole event loop, not just this request
+            if not self.profiling and profile_requested(scope):
+                await self.profile(scope, receive, send, timings, started)
+                return
+            
+            async def send_with_timing(message):
+                if message["type"] == "http.response.start":
+                    timings["total"] = (time.perf_counter() - started) * 1000
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", format_server_timing(timings))
+                await send(message)
+            
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_timings.reset(token)
+    
+    async def profile(self, scope, receive, send, timings: StageTimings, started: float):
+        status = 500
+        
+        async def discard(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+        
+        self.profiling = True
+        sampler = StackSampler(threading.get_ident(), PROFILE_SAMPLE_INTERVAL)
+        sampler.start()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            sampler.stop()
+            self.profiling = False
+        timings["total"] = (time.perf_counter() - started) * 1000
+        
+        response = Response(
+            sampler.collapsed(),
+            media_type="text/plain; charset=utf-8",
+            headers={
+                "Server-Timing": format_server_timing(timings),
+                "X-Profile-Samples": str(sampler.samples),
+                "X-Profiled-Status": str(status),
+                "Cache-Control": "no-store"
+            }
+        )
+        await response(scope, receive, send)
+
+app.add_middleware(ServerTimingMiddleware)
+
 # MongoDB connection
 MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
 client = AsyncIOMotorClient(MONGO_URL)
 db = client.strandwetter
-weather_collection = db.weather_data
-
-# Beach coordinates for Rügen
-BEACHES = {
-    "Binz": {"latitude": 54.40, "longitude": 13.61, "name": "Binz"},
-    "Sellin": {"latitude": 54.38, "longitude": 13.69, "name": "Sellin"},
-    "Göhren": {"latitude": 54.34, "longitude": 13.74, "name": "Göhren"},
-    "Baabe": {"latitude": 54.36, "longitude": 13.71, "name": "Baabe"},
-    "Sassnitz": {"latitude": 54.516728, "longitude": 13.644119, "name": "Sassnitz"},
-    "Prerow": {"latitude": 54.44694, "longitude": 12.56778, "name": "Prerow"},
-    "Lobbe": {"latitude": 54.317787, "longitude": 13.719735, "name": "Lobbe"}
-}
+# Latest snapshot per model grid cell, shared by the beaches inside it
+weather_collection = db.weather_cell_cache
+# Latest marine data per grid cell, cached separately with its own TTL
+marine_collection = db.marine_cell_cache
+# Compact hourly history: one document per cell and day with float32 arrays per variable
+history_collection = db.weather_history
+# Refresh leadership per kind and cell, shared by all workers
+lease_collection = db.refresh_leases
+
+async def ensure_indexes():
+    """Create the weather cache indexes, tolerating an unavailable database"""
+    try:
+        await weather_collection.create_index([("cell", ASCENDING)], unique=True)
+        await weather_collection.create_index([("cell", ASCENDING), ("timestamp", ASCENDING)])
+        # Entries past SNAPSHOT_MAX_STALENESS are never served, so let Mongo drop them
+        await weather_collection.create_index("expires_at", expireAfterSeconds=0)
+        await marine_collection.create_index("cell", unique=True)
+        await marine_collection.create_index("expires_at", expireAfterSeconds=0)
+        await history_collection.create_index([("cell", ASCENDING), ("date", ASCENDING)], unique=True)
+        # Only cleanup; lease validity is decided by comparing expires_at on acquire
+        await lease_collection.create_index("expires_at", expireAfterSeconds=0)
+    except Exception as e:
+        print(f"Error creating indexes: {e}")
+
+# Beach registry, loaded from a data file so the coast can grow without code changes
+BEACHES_FILE = os.environ.get('BEACHES_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'beaches.json'))
+# Bucket size of the spatial index
+BEACH_INDEX_CELL_DEGREES = float(os.environ.get('BEACH_INDEX_CELL_DEGREES', '0.1'))
+EARTH_RADIUS_KM = 6371.0
+
+def load_beach_registry(path: str) -> Dict[str, Dict[str, Any]]:
+    """Load the beach registry from a JSON file keyed by beach id"""
+    with open(path, encoding="utf-8") as registry_file:
+        entries = json.load(registry_file)["beaches"]
+    return {
+        entry["id"]: {
+            "latitude": float(entry["latitude"]),
+            "longitude": float(entry["longitude"]),
+            "name": entry.get("name", entry["id"]),
+            "region": entry.get("region")
+        }
+        for entry in entries
+    }
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in kilometres"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+class BeachIndex:
+    """Uniform lat/lon bucket grid over the registry for nearest-beach and bounding-box queries"""
+    
+    def __init__(self, beaches: Dict[str, Dict[str, Any]], cell_degrees: float):
+        self.beaches = beaches
+        self.cell_degrees = cell_degrees
+        self.buckets: Dict[tuple, List[str]] = {}
+        for beach_id, beach in beaches.items():
+            self.buckets.setdefault(self.bucket(beach["latitude"], beach["longitude"]), []).append(beach_id)
+        # Flat copy for queries that would otherwise walk many empty buckets
+        self.ids = list(beaches)
+        self.latitudes = np.radians([beach["latitude"] for beach in beaches.values()])
+        self.longitudes = np.radians([beach["longitude"] for beach in beaches.values()])
+        # Buckets and beaches a ring walk may touch before one vectorized scan over the registry is cheaper
+        self.walk_budget = max(len(self.ids) // 16, 256)
+        
+        rows = [row for row, _ in self.buckets] or [0]
+        cols = [col for _, col in self.buckets] or [0]
+        self.row_range = (min(rows), max(rows))
+        self.col_range = (min(cols), max(cols))
+        self.max_abs_lat = max((abs(beach["latitude"]) for beach in beaches.values()), default=0.0)
+    
+    def ring_km(self, rings: int, max_abs_lat: float) -> float:
+        """Lower bound for the distance to any point at least `rings` buckets away, with both latitudes within max_abs_lat"""
+        # Two points that far apart in longitude are closest at the same latitude, via the great circle towards the pole;
+        # a latitude offset of the same size is never shorter
+        degrees = min(rings * self.cell_degrees, 180.0)
+        cos_lat = math.cos(math.radians(min(max_abs_lat + self.cell_degrees, 89.0)))
+        return 2 * EARTH_RADIUS_KM * math.asin(cos_lat * math.sin(math.radians(degrees) / 2))
+    
+    def bucket(self, latitude: float, longitude: float) -> tuple:
+        return math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees)
+    
+    def nearest(self, latitude: float, longitude: float, k: int, max_km: Optional[float] = None) -> List[tuple]:
+        """Return up to k (distance_km, beach_id) pairs within max_km, closest first"""
+        row, col = self.bucket(latitude, longitude)
+        (min_row, max_row), (min_col, max_col) = self.row_range, self.col_range
+        # Rings that do not reach the registry's buckets are empty
+        first_ring = max(min_row - row, row - max_row, min_col - col, col - max_col, 0)
+        last_ring = max(abs(row - min_row), abs(row - max_row), abs(col - min_col), abs(col - max_col))
+        # The grid does not wrap, so its ring bound only holds while every beach is less than 180 degrees of longitude away
+        if max(abs(col - min_col), abs(col - max_col)) * self.cell_degrees >= 180.0 - self.cell_degrees:
+            return self.scan(latitude, longitude, k, max_km)
+        max_abs_lat = max(self.max_abs_lat, abs(latitude))
+        candidates = []
+        visited = 0
+        
+        for ring in range(first_ring, last_ring + 1):
+            # Everything from this ring outwards is at least ring - 1 buckets away
+            if max_km is not None and self.ring_km(ring - 1, max_abs_lat) > max_km:
+                break
+            if visited + len(candidates) > self.walk_budget:
+                return self.scan(latitude, longitude, k, max_km)
+            
+            # Visit only the buckets on the border of the current ring that lie within the registry
+            top, bottom = row - ring, row + ring
+            for r in range(max(top, min_row), min(bottom, max_row) + 1):
+                if r in (top, bottom):
+                    columns = range(max(col - ring, min_col), min(col + ring, max_col) + 1)
+                else:
+                    columns = [c for c in (col - ring, col + ring) if min_col <= c <= max_col]
+                for c in columns:
+                    visited += 1
+                    for beach_id in self.buckets.get((r, c), ()):
+                        beach = self.beaches[beach_id]
+                        candidates.append((haversine_km(latitude, longitude, beach["latitude"], beach["longitude"]), beach_id))
+            
+            # Anything outside the rings seen so far is at least ring buckets away
+            if len(candidates) >= k:
+                candidates.sort()
+                if candidates[k - 1][0] <= self.ring_km(ring, max_abs_lat):
+                    break
+        
+        candidates.sort()
+        if max_km is not None:
+            candidates = [candidate for candidate in candidates if candidate[0] <= max_km]
+        return candidates[:k]
+    
+    def scan(self, latitude: float, longitude: float, k: int, max_km: Optional[float] = None) -> List[tuple]:
+        """Exact k nearest by computing every beach's distance at once"""
+        if not self.ids:
+            return []
+        lat, lon = math.radians(latitude), math.radians(longitude)
+        a = (np.sin((self.latitudes - lat) / 2) ** 2
+             + math.cos(lat) * np.cos(self.latitudes) * np.sin((self.longitudes - lon) / 2) ** 2)
+        distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+        closest = np.argpartition(distances, k - 1)[:k] if k < len(distances) else np.arange(len(distances))
+        candidates = sorted((float(distances[i]), self.ids[i]) for i in closest)
+        if max_km is not None:
+            candidates = [candidate for candidate in candidates if candidate[0] <= max_km]
+        return candidates
+    
+    def within(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[str]:
+        """Return the ids of all beaches inside a bounding box"""
+        min_row, min_col = self.bucket(min_lat, min_lon)
+        max_row, max_col = self.bucket(max_lat, max_lon)
+        
+        if (max_row - min_row + 1) * (max_col - min_col + 1) > len(self.buckets):
+            bucket_keys = [key for key in self.buckets if min_row <= key[0] <= max_row and min_col <= key[1] <= max_col]
+        else:
+            bucket_keys = [(r, c) for r in range(min_row, max_row + 1) for c in range(min_col, max_col + 1)]
+        
+        return [
+            beach_id
+            for key in bucket_keys
+            for beach_id in self.buckets.get(key, ())
+            if min_lat <= self.beaches[beach_id]["latitude"] <= max_lat
+            and min_lon <= self.beaches[beach_id]["longitude"] <= max_lon
+        ]
+
+BEACHES = load_beach_registry(BEACHES_FILE)
+BEACH_INDEX = BeachIndex(BEACHES, BEACH_INDEX_CELL_DEGREES)
+
+# Model grid resolution used to share one upstream fetch between nearby beaches
+GRID_CELL_DEGREES = float(os.environ.get('GRID_CELL_DEGREES', '0.02'))
+
+def grid_cell(latitude: float, longitude: float) -> str:
+    """Snap coordinates to the model grid and return the cell key"""
+    lat = round(round(latitude / GRID_CELL_DEGREES) * GRID_CELL_DEGREES, 4)
+    lon = round(round(longitude / GRID_CELL_DEGREES) * GRID_CELL_DEGREES, 4)
+    return f"{lat:.4f},{lon:.4f}"
+
+def build_grid_cells(beaches: Dict[str, Dict[str, Any]]) -> tuple:
+    """Map beaches to grid cells, cells to their beaches and cells to their coordinates"""
+    beach_cells, cell_beaches, cells = {}, {}, {}
+    for beach_name, beach in beaches.items():
+        cell = grid_cell(beach["latitude"], beach["longitude"])
+        beach_cells[beach_name] = cell
+        cell_beaches.setdefault(cell, []).append(beach_name)
+        lat, lon = cell.split(",")
+        cells[cell] = {"latitude": float(lat), "longitude": float(lon)}
+    return beach_cells, cell_beaches, cells
+
+BEACH_CELLS, CELL_BEACHES, CELLS = build_grid_cells(BEACHES)
 
 class WeatherData(BaseModel):
     beach: str
@@ -53,137 +653,726 @@ class BeachRecommendation(BaseModel):
     best_time: str
     reasons: List[str]
 
-async def fetch_weather_data(beach_name: str, coordinates: Dict[str, float]) -> Dict[str, Any]:
-    """Fetch weather data from Open-Meteo API"""
-    lat = coordinates["latitude"]
-    lon = coordinates["longitude"]
-    
-    # Forecast API URL
-    forecast_url = (
-        f"https://api.open-meteo.com/v1/forecast"
-        f"?latitude={lat}&longitude={lon}"
-        f"&hourly=temperature_2m,relative_humidity_2m,apparent_temperature,precipitation_probability,precipitation,"
-        f"weather_code,cloud_cover,wind_speed_10m,wind_direction_10m,uv_index,is_day"
-        f"&daily=weather_code,temperature_2m_max,temperature_2m_min,apparent_temperature_max,"
-        f"apparent_temperature_min,sunrise,sunset,uv_index_max,precipitation_sum,rain_sum,"
-        f"wind_speed_10m_max,wind_direction_10m_dominant"
+class WeatherBatchRequest(BaseModel):
+    beaches: List[str] = Field(..., min_length=1, max_length=WEATHER_BATCH_MAX_BEACHES)
+    fields: Optional[str] = None
+    format: str = Field("full", pattern="^(full|compact)$")
+
+class CircuitBreaker:
+    """Opens after consecutive upstream failures and lets one probe through after a cool-down"""
+    
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+    
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if self.probing else "open"
+    
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if not self.probing and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.probing = True
+            return True
+        return False
+    
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+    
+    def record_failure(self):
+        self.failures += 1
+        if self.probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self.probing = False
+    
+    def abandon_probe(self):
+        """A probe that ended without a verdict (e.g. cancelled) counts as failed, so a later one can follow"""
+        if self.probing:
+            self.record_failure()
+
+class UpstreamBudgetExhausted(asyncio.TimeoutError):
+    """The time budget of an upstream call ran out before the next attempt could be sent"""
+
+class TokenBucket:
+    """Client-side rate limiter so we never hammer an upstream host"""
+    
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+    
+    async def acquire(self):
+        while self.rate > 0:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+circuit_breakers: Dict[str, CircuitBreaker] = {}
+rate_limiters: Dict[str, TokenBucket] = {}
+
+async def fetch_upstream_json(url: str) -> tuple:
+    """GET an Open-Meteo URL and return (status, json), with retries, circuit breaker and rate limit"""
+    host = urlparse(url).netloc
+    breaker = circuit_breakers.setdefault(host, CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT))
+    limiter = rate_limiters.setdefault(host, TokenBucket(UPSTREAM_RATE_LIMIT, UPSTREAM_RATE_BURST))
+    
+    deadline = time.monotonic() + min(UPSTREAM_DEADLINE, BEACH_FETCH_TIMEOUT)
+    
+    for attempt in range(UPSTREAM_RETRIES + 1):
+        if not breaker.allow():
+            raise HTTPException(status_code=503, detail=f"Upstream {host} unavailable (circuit open)")
+        # allow() only lets one caller through while half-open, and that call set probing
+        probe = breaker.probing
+        
+        error = None
+        started = time.perf_counter()
+        try:
+            await limiter.acquire()
+            # Queueing for the rate limiter may have spent the budget, and aiohttp reads a zero total as no timeout at all
+            remaining = min(UPSTREAM_TOTAL_TIMEOUT, deadline - time.monotonic())
+            if remaining <= 0:
+                raise UpstreamBudgetExhausted(f"Upstream {host} call ran out of time before sending")
+            with timed("upstream"):
+                timeout = aiohttp.ClientTimeout(
+                    total=remaining,
+                    sock_connect=UPSTREAM_CONNECT_TIMEOUT,
+                    sock_read=UPSTREAM_READ_TIMEOUT,
+                )
+                async with get_http_session().get(url, timeout=timeout) as response:
+                    status = response.status
+                    if status == 200:
+                        with timed("decode"):
+                            data = await response.json()
+            if status == 200:
+                UPSTREAM_LATENCY.observe(time.perf_counter() - started, host)
+                UPSTREAM_REQUESTS.inc(host, "200")
+                breaker.record_success()
+                return status, data
+        except UpstreamBudgetExhausted:
+            # Nothing was sent, so this says nothing about the host
+            if probe:
+                breaker.abandon_probe()
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            status, error = None, e
+        except BaseException:
+            # Cancellation (caller timeouts, hang-ups, shutdown) or a bad body skips the verdicts below
+            if probe:
+                breaker.abandon_probe()
+            raise
+        UPSTREAM_LATENCY.observe(time.perf_counter() - started, host)
+        UPSTREAM_REQUESTS.inc(host, str(status) if status is not None else type(error).__name__)
+        
+        # Other client errors will not improve on retry and say nothing about host health
+        if status is not None and status != 429 and status < 500:
+            breaker.record_success()
+            return status, None
+        
+        breaker.record_failure()
+        # Exponential backoff with full jitter, unless the next attempt would not fit the budget
+        delay = random.uniform(0, min(UPSTREAM_BACKOFF_MAX, UPSTREAM_BACKOFF_BASE * 2 ** attempt))
+        if attempt == UPSTREAM_RETRIES or deadline - time.monotonic() - delay <= UPSTREAM_CONNECT_TIMEOUT:
+            if error is not None:
+                raise error
+            return status, None
+        
+        await asyncio.sleep(delay)
+
+# Variables requested from Open-Meteo; only these are decoded into snapshots
+FORECAST_HOURLY_VARIABLES = (
+    "temperature_2m", "relative_humidity_2m", "apparent_temperature", "precipitation_probability", "precipitation",
+    "weather_code", "cloud_cover", "wind_speed_10m", "wind_direction_10m", "uv_index", "is_day"
+)
+FORECAST_DAILY_VARIABLES = (
+    "weather_code", "temperature_2m_max", "temperature_2m_min", "apparent_temperature_max", "apparent_temperature_min",
+    "sunrise", "sunset", "uv_index_max", "precipitation_sum", "rain_sum", "wind_speed_10m_max", "wind_direction_10m_dominant"
+)
+MARINE_HOURLY_VARIABLES = ("wave_height", "wave_direction", "wave_period", "sea_surface_temperature")
+# Variables Open-Meteo reports as whole numbers, rendered back as integers
+INTEGER_VARIABLES = {
+    "relative_humidity_2m", "precipitation_probability", "weather_code", "cloud_cover",
+    "wind_direction_10m", "is_day", "wave_direction"
+}
+# Open-Meteo values carry at most two decimals, so float32 round-trips them exactly at this precision
+FLOAT32_DECIMALS = 3
+
+@functools.lru_cache(maxsize=256)
+def time_axis_strings(start: np.datetime64, step: np.timedelta64, length: int) -> tuple:
+    """Rendered time stamps of an axis; cells refreshed together share one axis"""
+    return tuple(np.datetime_as_string(start + np.arange(length) * step, unit="m").tolist())
+
+class HourlySeries:
+    """Hourly variables on one evenly spaced time axis (start + step) with float32 values, NaN when missing"""
+    __slots__ = ("start", "step", "length", "variables", "integers")
+    
+    def __init__(self, start: np.datetime64, step: np.timedelta64, length: int, variables: Dict[str, np.ndarray]):
+        self.start = start
+        self.step = step
+        self.length = length
+        self.variables = variables
+        # Decided once per snapshot so rendering stays a cheap cast
+        self.integers = frozenset(
+            name for name, values in variables.items()
+            if name in INTEGER_VARIABLES and np.array_equal(values[~np.isnan(values)], np.round(values[~np.isnan(values)]))
+        )
+    
+    @classmethod
+    def from_json(cls, hourly: Dict[str, Any], names: tuple) -> "HourlySeries":
+        time_strings = hourly.get("time") or []
+        length = len(time_strings)
+        step = np.timedelta64(60, "m")
+        start = np.datetime64(time_strings[0].replace('Z', ''), "m") if length else np.datetime64("NaT", "m")
+        if length > 1:
+            step = np.datetime64(time_strings[1].replace('Z', ''), "m") - start
+            if np.datetime64(time_strings[-1].replace('Z', ''), "m") != start + (length - 1) * step:
+                raise ValueError("Hourly time axis is not evenly spaced")
+        
+        # Series shorter than the time axis stay short, as scoring treats missing tail hours differently from nulls
+        variables = {
+            name: np.array(hourly[name][:length], dtype=np.float32)
+            for name in names if name in hourly
+        }
+        return cls(start, step, length, variables)
+    
+    def __len__(self) -> int:
+        return self.length
+    
+    @property
+    def times(self) -> np.ndarray:
+        return self.start + np.arange(self.length) * self.step
+    
+    def time_strings(self) -> tuple:
+        return time_axis_strings(self.start, self.step, self.length)
+    
+    def value(self, name: str, index: int) -> Optional[float]:
+        """One value as a plain Python number, or None when missing"""
+        values = self.variables.get(name)
+        if values is None or index >= len(values) or np.isnan(values[index]):
+            return None
+        if name in self.integers:
+            return int(values[index])
+        return round(float(values[index]), FLOAT32_DECIMALS)
+    
+    def render(self, name: str) -> Any:
+        """A variable in its JSON form; orjson writes float32 arrays and NaN as null directly"""
+        values = self.variables[name]
+        if name not in self.integers:
+            return values
+        if not np.isnan(values).any():
+            return values.astype(np.int32)
+        return [None if np.isnan(value) else int(value) for value in values]
+    
+    def to_json(self, names: Optional[List[str]] = None) -> Dict[str, Any]:
+        """The Open-Meteo "hourly" shape: a time list plus one series per variable"""
+        hourly = {"time": self.time_strings()}
+        for name in (self.variables if names is None else names):
+            hourly[name] = self.render(name)
+        return hourly
+    
+    def to_document(self) -> Dict[str, Any]:
+        return {
+            "start": None if np.isnat(self.start) else self.start.astype(datetime),
+            "step_minutes": int(self.step.astype(int)),
+            "length": self.length,
+            "variables": {name: Binary(values.astype("<f4").tobytes()) for name, values in self.variables.items()}
+        }
+    
+    @classmethod
+    def from_document(cls, document: Dict[str, Any]) -> "HourlySeries":
+        start = np.datetime64(document["start"], "m") if document["start"] is not None else np.datetime64("NaT", "m")
+        return cls(
+            start,
+            np.timedelta64(document["step_minutes"], "m"),
+            document["length"],
+            {name: np.frombuffer(raw, dtype="<f4").astype(np.float32) for name, raw in document["variables"].items()}
+        )
+
+class Forecast:
+    """One Open-Meteo response: scalar metadata, compact hourly series and the small daily block as-is"""
+    __slots__ = ("meta", "hourly", "daily", "_digest")
+    
+    def __init__(self, meta: Dict[str, Any], hourly: HourlySeries, daily: Optional[Dict[str, list]]):
+        self.meta = meta
+        self.hourly = hourly
+        self.daily = daily
+        self._digest = None
+    
+    @property
+    def digest(self) -> bytes:
+        """Content hash of the data, ignoring per-response metadata such as generationtime_ms"""
+        if self._digest is None:
+            content = hashlib.blake2b(digest_size=16)
+            meta = {key: value for key, value in self.meta.items() if key != "generationtime_ms"}
+            content.update(orjson.dumps([meta, self.daily], option=orjson.OPT_SORT_KEYS))
+            content.update(f"{self.hourly.start}|{self.hourly.step}|{self.hourly.length}".encode())
+            for name in sorted(self.hourly.variables):
+                content.update(name.encode())
+                content.update(self.hourly.variables[name].tobytes())
+            self._digest = content.digest()
+        return self._digest
+    
+    @classmethod
+    def from_json(cls, data: Dict[str, Any], hourly_names: tuple) -> "Forecast":
+        meta = {key: value for key, value in data.items() if key not in ("hourly", "daily")}
+        return cls(meta, HourlySeries.from_json(data.get("hourly") or {}, hourly_names), data.get("daily"))
+    
+    def to_json(self) -> Dict[str, Any]:
+        """Render in the upstream response shape"""
+        data = {**self.meta, "hourly": self.hourly.to_json()}
+        if self.daily is not None:
+            data["daily"] = self.daily
+        return data
+    
+    def to_document(self) -> Dict[str, Any]:
+        return {"meta": self.meta, "hourly": self.hourly.to_document(), "daily": self.daily}
+    
+    @classmethod
+    def from_document(cls, document: Dict[str, Any], hourly_names: tuple) -> "Forecast":
+        # Documents written before the compact model hold the raw upstream response
+        if "meta" not in document:
+            return cls.from_json(document, hourly_names)
+        return cls(document["meta"], HourlySeries.from_document(document["hourly"]), document.get("daily"))
+
+def build_forecast_url(latitudes: List[float], longitudes: List[float]) -> str:
+    """Build the Open-Meteo forecast URL for one or more locations"""
+    return (
+        f"{FORECAST_API_URL}"
+        f"?latitude={','.join(str(lat) for lat in latitudes)}"
+        f"&longitude={','.join(str(lon) for lon in longitudes)}"
+        f"&hourly={','.join(FORECAST_HOURLY_VARIABLES)}"
+        f"&daily={','.join(FORECAST_DAILY_VARIABLES)}"
         f"&timezone=Europe/Berlin&forecast_days=3"
     )
-    
-    # Marine API URL
-    marine_url = (
-        f"https://marine-api.open-meteo.com/v1/marine"
-        f"?latitude={lat}&longitude={lon}"
-        f"&hourly=wave_height,wave_direction,wave_period,sea_surface_temperature"
+
+def build_marine_url(latitudes: List[float], longitudes: List[float]) -> str:
+    """Build the Open-Meteo marine URL for one or more locations"""
+    return (
+        f"{MARINE_API_URL}"
+        f"?latitude={','.join(str(lat) for lat in latitudes)}"
+        f"&longitude={','.join(str(lon) for lon in longitudes)}"
+        f"&hourly={','.join(MARINE_HOURLY_VARIABLES)}"
         f"&timezone=Europe/Berlin&forecast_days=3"
     )
+
+def build_weather_data(cells: List[str], forecasts: List[Dict]) -> Dict[str, Dict[str, Any]]:
+    """Decode and score a set of forecasts in one pass and assemble each grid cell's weather snapshot"""
+    with timed("decode"):
+        forecasts = [Forecast.from_json(data, FORECAST_HOURLY_VARIABLES) for data in forecasts]
+    # Most refreshes return the run already cached; those keep their snapshot and scores
+    previous = [weather_cache.peek(cell) for cell in cells]
+    changed = [
+        index for index, (forecast_data, snapshot) in enumerate(zip(forecasts, previous))
+        if snapshot is None or snapshot["forecast"].digest != forecast_data.digest
+    ]
+    # Marine-based profile bands use whatever marine data is cached; it is rescored when marine data arrives
+    marines = [cached_marine(cells[index]) for index in changed]
     
     try:
-        async with aiohttp.ClientSession() as session:
-            # Fetch both APIs concurrently
-            forecast_task = session.get(forecast_url)
-            marine_task = session.get(marine_url)
-            
-            forecast_response, marine_response = await asyncio.gather(forecast_task, marine_task)
-            
-            if forecast_response.status == 200 and marine_response.status == 200:
-                forecast_data = await forecast_response.json()
-                marine_data = await marine_response.json()
-                
-                # Calculate beach score and best time
-                best_time, beach_score = calculate_beach_recommendation(forecast_data, marine_data)
-                
-                return {
-                    "beach": beach_name,
-                    "forecast": forecast_data,
-                    "marine": marine_data,
-                    "best_time": best_time,
-                    "beach_score": beach_score,
-                    "timestamp": datetime.now()
-                }
-            else:
-                raise HTTPException(status_code=500, detail=f"API Error: {forecast_response.status}/{marine_response.status}")
-                
+        with timed("score"):
+            scores = calculate_beach_scores([forecasts[index] for index in changed], marines) if changed else []
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Weather API Error: {str(e)}")
+        print(f"Error calculating beach recommendation: {e}")
+        scores = [
+            {"best_time": None, "beach_score": 0.0, "hourly_scores": [], "best_windows": [], "profiles": {}}
+            for _ in changed
+        ]
+    
+    timestamp = datetime.now()
+    # Unchanged cells keep their cached snapshot and scores under a new timestamp
+    results = {cell: {**snapshot, "timestamp": timestamp} for cell, snapshot in zip(cells, previous) if snapshot is not None}
+    for index, score in zip(changed, scores):
+        results[cells[index]] = {
+            "cell": cells[index],
+            "forecast": forecasts[index],
+            "best_time": score["best_time"],
+            "beach_score": score["beach_score"],
+            "hourly_scores": score["hourly_scores"],
+            "best_windows": score["best_windows"],
+            "profiles": score["profiles"],
+            "timestamp": timestamp,
+            "modified_at": timestamp
+        }
+    return results
 
-def calculate_beach_recommendation(forecast_data: Dict, marine_data: Dict) -> tuple:
-    """Calculate the best beach time and overall beach score"""
+def build_marine_data(cells: List[str], marines: List[Dict]) -> Dict[str, Dict[str, Any]]:
+    """Decode a set of marine responses into each grid cell's marine snapshot"""
+    with timed("decode"):
+        marines = [Forecast.from_json(data, MARINE_HOURLY_VARIABLES) for data in marines]
+    timestamp = datetime.now()
+    results = {}
+    for cell, marine_data in zip(cells, marines):
+        previous = marine_cache.peek(cell)
+        if previous is not None and previous["marine"].digest == marine_data.digest:
+            # Unchanged data keeps the cached object and its modification time
+            results[cell] = {**previous, "timestamp": timestamp}
+        else:
+            results[cell] = {"cell": cell, "marine": marine_data, "timestamp": timestamp, "modified_at": timestamp}
+    return results
+
+# Errors that say the upstream host is failing, as opposed to this particular request
+UPSTREAM_HOST_FAILURES = {502, 503, 504}
+
+def is_host_failure(error: BaseException) -> bool:
+    return isinstance(error, asyncio.TimeoutError) or (
+        isinstance(error, HTTPException) and error.status_code in UPSTREAM_HOST_FAILURES
+    )
+
+async def fetch_locations(url: str, cells: List[str]) -> List[Dict]:
+    """GET one batched Open-Meteo URL and return the per-location results in request order"""
     try:
-        hourly_temps = forecast_data["hourly"]["temperature_2m"]
-        hourly_precip = forecast_data["hourly"]["precipitation_probability"]
-        hourly_uv = forecast_data["hourly"]["uv_index"]
-        hourly_clouds = forecast_data["hourly"]["cloud_cover"]
-        hourly_wind = forecast_data["hourly"]["wind_speed_10m"]
-        hourly_times = forecast_data["hourly"]["time"]
+        status, data = await fetch_upstream_json(url)
+        if status != 200:
+            # Server errors and throttling persisted through the retries; other client errors are about this request
+            raise HTTPException(status_code=502 if status == 429 or status >= 500 else 500, detail=f"API Error: {status}")
         
-        best_score = 0
-        best_time = None
+        # Open-Meteo answers a single location with an object and several with a list in request order
+        if isinstance(data, dict):
+            data = [data]
+        if len(data) != len(cells):
+            raise HTTPException(status_code=500, detail="API Error: batch response does not match requested locations")
         
-        # Only consider daytime hours (6 AM to 8 PM)
-        current_date = datetime.now().date()
+    except HTTPException:
+        raise
+    except asyncio.TimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"Weather API Error: {str(e) or 'timeout'}")
+    except aiohttp.ClientError as e:
+        raise HTTPException(status_code=502, detail=f"Weather API Error: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Weather API Error: {str(e)}")
+    
+    return data
+
+async def fetch_weather_batch(cells: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Fetch the forecast for several grid cells with a single call"""
+    latitudes = [CELLS[cell]["latitude"] for cell in cells]
+    longitudes = [CELLS[cell]["longitude"] for cell in cells]
+    return build_weather_data(cells, await fetch_locations(build_forecast_url(latitudes, longitudes), cells))
+
+async def fetch_marine_batch(cells: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Fetch marine data for several grid cells with a single call"""
+    latitudes = [CELLS[cell]["latitude"] for cell in cells]
+    longitudes = [CELLS[cell]["longitude"] for cell in cells]
+    return build_marine_data(cells, await fetch_locations(build_marine_url(latitudes, longitudes), cells))
+
+async def fetch_all_cells(cells: List[str], fetch_batch=fetch_weather_batch) -> Dict[str, Any]:
+    """Fetch data for several grid cells concurrently in batches, isolating per-cell failures"""
+    # Failures come back as exceptions in place of the cell's data
+    semaphore = asyncio.Semaphore(FETCH_CONCURRENCY)
+    
+    async def fetch_one(cell: str) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                return (await asyncio.wait_for(fetch_batch([cell]), timeout=BEACH_FETCH_TIMEOUT))[cell]
+            except asyncio.TimeoutError:
+                raise HTTPException(status_code=504, detail=f"Timeout fetching weather for {', '.join(CELL_BEACHES[cell])}")
+    
+    async def fetch_chunk(chunk: List[str]) -> Dict[str, Any]:
+        try:
+            async with semaphore:
+                return await asyncio.wait_for(fetch_batch(chunk), timeout=BEACH_FETCH_TIMEOUT)
+        except asyncio.TimeoutError:
+            return {
+                cell: HTTPException(status_code=504, detail=f"Timeout fetching weather for {', '.join(CELL_BEACHES[cell])}")
+                for cell in chunk
+            }
+        except Exception as e:
+            # A failing host fails every cell; per-cell requests would only add load to it
+            if is_host_failure(e):
+                return {cell: e for cell in chunk}
+        # Fall back to per-cell requests so one bad location only fails itself
+        results = await asyncio.gather(*(fetch_one(cell) for cell in chunk), return_exceptions=True)
+        return dict(zip(chunk, results))
+    
+    if UPSTREAM_BATCH_SIZE > 1 and len(cells) > 1:
+        chunks = [cells[i:i + UPSTREAM_BATCH_SIZE] for i in range(0, len(cells), UPSTREAM_BATCH_SIZE)]
+        results = {}
+        for chunk_results in await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks)):
+            results.update(chunk_results)
+        return {cell: results[cell] for cell in cells}
+    
+    results = await asyncio.gather(*(fetch_one(cell) for cell in cells), return_exceptions=True)
+    return dict(zip(cells, results))
+
+# Value assumed when a forecast series is too short; other variables score nothing when missing
+SCORING_DEFAULTS = {
+    "temperature_2m": 15,
+    "precipitation_probability": 100,
+    "uv_index": 10,
+    "cloud_cover": 100,
+    "wind_speed_10m": 30
+}
+SCORING_HOURS = 72
+# Hours considered for the single best time, as before
+BEST_TIME_HOURS = 24
+# Length of the best contiguous beach window searched on each forecast day
+BEST_WINDOW_HOURS = int(os.environ.get('BEST_WINDOW_HOURS', '3'))
+
+# Named scoring profiles. Per variable, bands are checked in order and the first
+# matching band awards its points; bounds are "min" (>=), "max" (<=), "below" (<)
+# and "above" (>). Every profile sums to at most 100.
+SCORING_PROFILES = {
+    # The original scheme (ideal: 20-28°C, little rain, moderate UV, some clouds, gentle breeze)
+    "default": {
+        "temperature_2m": [{"min": 20, "max": 28, "points": 30}, {"min": 18, "max": 32, "points": 20},
+                           {"min": 15, "max": 35, "points": 10}],
+        "precipitation_probability": [{"max": 10, "points": 25}, {"max": 30, "points": 15}, {"max": 50, "points": 5}],
+        "uv_index": [{"min": 3, "max": 6, "points": 20}, {"min": 1, "max": 8, "points": 15}, {"below": 1, "points": 5}],
+        "cloud_cover": [{"max": 30, "points": 15}, {"max": 60, "points": 10}, {"max": 80, "points": 5}],
+        "wind_speed_10m": [{"min": 5, "max": 15, "points": 10}, {"max": 25, "points": 5}]
+    },
+    # Warm but not hot, dry, low UV and little wind
+    "family": {
+        "temperature_2m": [{"min": 22, "max": 28, "points": 30}, {"min": 20, "max": 30, "points": 20},
+                           {"min": 18, "max": 32, "points": 10}],
+        "precipitation_probability": [{"max": 10, "points": 30}, {"max": 20, "points": 20}, {"max": 40, "points": 5}],
+        "uv_index": [{"max": 4, "points": 20}, {"max": 6, "points": 10}],
+        "cloud_cover": [{"max": 40, "points": 10}, {"max": 70, "points": 5}],
+        "wind_speed_10m": [{"max": 12, "points": 10}, {"max": 20, "points": 5}]
+    },
+    # Wind decides; manageable waves and no rain help
+    "kitesurf": {
+        "wind_speed_10m": [{"min": 22, "max": 40, "points": 50}, {"min": 16, "max": 50, "points": 30},
+                           {"min": 12, "max": 55, "points": 10}],
+        "precipitation_probability": [{"max": 20, "points": 15}, {"max": 50, "points": 8}],
+        "wave_height": [{"max": 1.5, "points": 15}, {"max": 2.5, "points": 8}],
+        "temperature_2m": [{"min": 15, "points": 10}, {"min": 10, "points": 5}],
+        "cloud_cover": [{"max": 60, "points": 10}, {"max": 90, "points": 5}]
+    },
+    # Warm water and a calm sea
+    "swim": {
+        "sea_surface_temperature": [{"min": 20, "points": 35}, {"min": 18, "points": 25}, {"min": 16, "points": 15},
+                                    {"min": 14, "points": 5}],
+        "temperature_2m": [{"min": 22, "max": 32, "points": 20}, {"min": 18, "max": 34, "points": 10}],
+        "wave_height": [{"max": 0.5, "points": 20}, {"max": 1.0, "points": 10}],
+        "precipitation_probability": [{"max": 20, "points": 15}, {"max": 50, "points": 5}],
+        "wind_speed_10m": [{"max": 15, "points": 10}, {"max": 25, "points": 5}]
+    }
+}
+DEFAULT_PROFILE = "default"
+# Profiles with marine bands can only be ranked properly once the cells' marine data is loaded
+MARINE_PROFILES = {name for name, bands in SCORING_PROFILES.items() if not set(bands).isdisjoint(MARINE_HOURLY_VARIABLES)}
+
+def band_matches(band: Dict[str, float], value: float) -> bool:
+    return (
+        ("min" not in band or value >= band["min"]) and ("max" not in band or value <= band["max"])
+        and ("below" not in band or value < band["below"]) and ("above" not in band or value > band["above"])
+    )
+
+class CompiledProfiles:
+    """Scoring profiles compiled into one threshold table per variable.
+
+    The bounds of all profiles split a variable's range into regions: the bounds
+    themselves and the open intervals between them. No band changes its verdict
+    inside a region, so a (profile x region) table of points replaces the band
+    checks, and one searchsorted per variable scores every profile at once.
+    """
+    
+    def __init__(self, profiles: Dict[str, Dict[str, List[Dict[str, float]]]]):
+        self.names = list(profiles)
+        self.variables = sorted({variable for bands in profiles.values() for variable in bands})
+        self.bounds: Dict[str, np.ndarray] = {}
+        self.tables: Dict[str, np.ndarray] = {}
+        for variable in self.variables:
+            bounds = np.array(sorted({
+                band[key] for bands in profiles.values() for band in bands.get(variable, [])
+                for key in ("min", "max", "below", "above") if key in band
+            }), dtype=float)
+            # One representative value per region: below, at and between the bounds
+            midpoints = (bounds[:-1] + bounds[1:]) / 2
+            gaps = np.concatenate([[bounds[0] - 1], midpoints, [bounds[-1] + 1]]) if len(bounds) else np.zeros(1)
+            representatives = np.empty(len(gaps) + len(bounds))
+            representatives[0::2] = gaps
+            representatives[1::2] = bounds
+            self.bounds[variable] = bounds
+            self.tables[variable] = np.array([
+                [next((band["points"] for band in profiles[name].get(variable, []) if band_matches(band, value)), 0)
+                 for value in representatives]
+                for name in self.names
+            ], dtype=float)
+    
+    def regions(self, variable: str, values: np.ndarray) -> np.ndarray:
+        """Region of each value: 2i for the gap below bound i, 2i + 1 for bound i itself"""
+        bounds = self.bounds[variable]
+        if not len(bounds):
+            return np.zeros(values.shape, dtype=int)
+        position = np.searchsorted(bounds, values, side="left")
+        on_bound = bounds[np.minimum(position, len(bounds) - 1)] == values
+        return 2 * position + on_bound
+    
+    def score(self, matrix: Dict[str, np.ndarray]) -> np.ndarray:
+        """Score every hour of every beach for every profile: (profile x beach x hour)"""
+        shape = next(iter(matrix.values())).shape
+        total = np.zeros((len(self.names),) + shape)
+        for variable in self.variables:
+            values = matrix[variable]
+            points = self.tables[variable][:, self.regions(variable, values)]
+            # Missing values score nothing
+            total += np.where(np.isnan(values), 0, points)
+        return total
+
+SCORING = CompiledProfiles(SCORING_PROFILES)
+
+def build_scoring_matrix(forecasts: List[Forecast], marines: Optional[List[Forecast]] = None) -> tuple:
+    """Stack the hourly series of several forecasts into 2-D arrays (beach x hour), marine aligned to the forecast"""
+    hours = min(SCORING_HOURS, max((len(f.hourly) for f in forecasts), default=0))
+    valid = np.zeros((len(forecasts), hours), dtype=bool)
+    # Padding hours stay NaT
+    times = np.full((len(forecasts), hours), np.datetime64("NaT"), dtype="datetime64[m]")
+    matrix = {
+        name: np.full((len(forecasts), hours), SCORING_DEFAULTS.get(name, np.nan), dtype=float)
+        for name in SCORING.variables
+    }
+    
+    for row, forecast in enumerate(forecasts):
+        series = forecast.hourly
+        length = min(hours, len(series))
+        times[row, :length] = series.times[:length]
+        valid[row, :length] = True
+        for name in SCORING.variables:
+            if name in series.variables:
+                values = series.variables[name][:length]
+                # Missing (null) values are NaN and score nothing
+                matrix[name][row, :len(values)] = values
         
-        for i, time_str in enumerate(hourly_times[:24]):  # First 24 hours
-            hour = datetime.fromisoformat(time_str.replace('Z', '+00:00')).hour
-            
-            if 6 <= hour <= 20:  # Daytime hours
-                temp = hourly_temps[i] if i < len(hourly_temps) else 15
-                precip = hourly_precip[i] if i < len(hourly_precip) else 100
-                uv = hourly_uv[i] if i < len(hourly_uv) else 10
-                clouds = hourly_clouds[i] if i < len(hourly_clouds) else 100
-                wind = hourly_wind[i] if i < len(hourly_wind) else 30
-                
-                # Calculate score based on ideal beach conditions
-                score = 0
-                
-                # Temperature score (ideal: 20-28°C)
-                if 20 <= temp <= 28:
-                    score += 30
-                elif 18 <= temp <= 32:
-                    score += 20
-                elif 15 <= temp <= 35:
-                    score += 10
-                
-                # Precipitation score (lower is better)
-                if precip <= 10:
-                    score += 25
-                elif precip <= 30:
-                    score += 15
-                elif precip <= 50:
-                    score += 5
-                
-                # UV score (moderate UV is good)
-                if 3 <= uv <= 6:
-                    score += 20
-                elif 1 <= uv <= 8:
-                    score += 15
-                elif uv < 1:
-                    score += 5
-                
-                # Cloud cover score (some clouds are okay)
-                if clouds <= 30:
-                    score += 15
-                elif clouds <= 60:
-                    score += 10
-                elif clouds <= 80:
-                    score += 5
-                
-                # Wind score (gentle breeze is ideal)
-                if 5 <= wind <= 15:
-                    score += 10
-                elif wind <= 25:
-                    score += 5
-                
-                if score > best_score:
-                    best_score = score
-                    best_time = time_str
-        
-        # Format best time for German display
-        if best_time:
-            best_time_dt = datetime.fromisoformat(best_time.replace('Z', '+00:00'))
-            best_time = best_time_dt.strftime("%H:%M")
-        
-        return best_time, round(best_score, 1)
+        marine = marines[row].hourly if marines and marines[row] is not None else None
+        if marine is None or not length or not len(marine) or marine.step != series.step:
+            continue
+        shift = int((marine.start - series.start) // series.step)
+        for name in SCORING.variables:
+            if name in marine.variables and name not in series.variables:
+                values = marine.variables[name]
+                first, last = max(shift, 0), min(shift + len(values), length)
+                if first < last:
+                    matrix[name][row, first:last] = values[first - shift:last - shift]
+    
+    return times, valid, matrix
+
+def daytime_mask(times: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """Mark the daytime hours (6 AM to 8 PM) of a datetime64 hour grid"""
+    hour_of_day = (times - times.astype("datetime64[D]")).astype("timedelta64[h]").astype(int)
+    return valid & (hour_of_day >= 6) & (hour_of_day <= 20)
+
+def find_best_windows(times: np.ndarray, daytime: np.ndarray, scores: np.ndarray, window_hours: int) -> List[List[Dict[str, Any]]]:
+    """Find the best contiguous daytime window of each forecast day for every beach"""
+    beaches, hours = scores.shape
+    if window_hours < 1 or hours < window_hours:
+        return [[] for _ in range(beaches)]
+    
+    # Sliding window sums via prefix sums: O(hours) per beach
+    zero = np.zeros((beaches, 1))
+    score_sums = np.concatenate([zero, np.cumsum(scores, axis=1)], axis=1)
+    daytime_sums = np.concatenate([zero, np.cumsum(daytime, axis=1)], axis=1)
+    window_sums = score_sums[:, window_hours:] - score_sums[:, :-window_hours]
+    # A window counts only if every hour in it is daytime, which also keeps it within one day
+    window_valid = (daytime_sums[:, window_hours:] - daytime_sums[:, :-window_hours]) == window_hours
+    
+    start_times = times[:, :hours - window_hours + 1]
+    start_days = start_times.astype("datetime64[D]")
+    
+    results = [[] for _ in range(beaches)]
+    rows = np.arange(beaches)
+    for day in np.unique(start_days[window_valid]):
+        candidates = np.where(window_valid & (start_days == day), window_sums, -np.inf)
+        best = np.argmax(candidates, axis=1)
+        found = np.flatnonzero(np.isfinite(candidates[rows, best]))
+        # Format all of the day's windows at once; per-element datetime64 str() is slow
+        starts = start_times[found, best[found]]
+        start_strings = np.datetime_as_string(starts, unit="m")
+        end_strings = np.datetime_as_string(starts + np.timedelta64(window_hours, "h"), unit="m")
+        sums = window_sums[found, best[found]].tolist()
+        date = str(day)
+        for position, row in enumerate(found.tolist()):
+            results[row].append({
+                "date": date,
+                "start": start_strings[position][11:16],
+                "end": end_strings[position][11:16],
+                "score": round(sums[position] / window_hours, 1)
+            })
+    
+    return results
+
+def profile_scores(weather_data: Dict[str, Any], profile: str = DEFAULT_PROFILE) -> Dict[str, Any]:
+    """A snapshot's score, best time, windows and hourly scores under one profile"""
+    if profile == DEFAULT_PROFILE:
+        return weather_data
+    return weather_data.get("profiles", {}).get(profile) or {
+        "best_time": None, "beach_score": 0.0, "hourly_scores": [], "best_windows": []
+    }
+
+def calculate_snapshot_windows(weather_data: Dict[str, Any], window_hours: int, profile: str = DEFAULT_PROFILE) -> List[Dict[str, Any]]:
+    """Recompute a snapshot's best daily windows for a non-default window length"""
+    scores = np.array([profile_scores(weather_data, profile).get("hourly_scores", [])], dtype=float)
+    times = weather_data["forecast"].hourly.times[:scores.shape[1]].reshape(1, -1)
+    return find_best_windows(times, daytime_mask(times, np.ones(times.shape, dtype=bool)), scores, window_hours)[0]
+
+def calculate_beach_scores(forecasts: List[Forecast], marines: Optional[List[Optional[Forecast]]] = None) -> List[Dict[str, Any]]:
+    """Score several forecasts under every profile at once: best time, beach score and per-hour scores.
+
+    The default profile's results are returned at the top level as before; all
+    profiles, including the default, are under "profiles".
+    """
+    started = time.perf_counter()
+    times, valid, matrix = build_scoring_matrix(forecasts, marines)
+    profiles, beaches, hours = len(SCORING.names), len(forecasts), times.shape[1]
+    
+    # Only consider daytime hours (6 AM to 8 PM)
+    daytime = daytime_mask(times, valid)
+    scores = np.where(daytime, SCORING.score(matrix), 0)
+    # Windows of all profiles in one pass over a (profile * beach) x hour grid
+    best_windows = find_best_windows(
+        np.tile(times, (profiles, 1)), np.tile(daytime, (profiles, 1)),
+        scores.reshape(profiles * beaches, hours), BEST_WINDOW_HOURS
+    )
+    
+    window = scores[:, :, :BEST_TIME_HOURS]
+    best_index = np.argmax(window, axis=2) if hours else np.zeros((profiles, beaches), dtype=int)
+    best_scores = window.max(axis=2) if hours else np.zeros((profiles, beaches))
+    
+    results = []
+    for row in range(beaches):
+        length = int(valid[row].sum())
+        by_profile = {}
+        for position, name in enumerate(SCORING.names):
+            best_time = None
+            if best_scores[position, row] > 0:
+                # Format best time for German display
+                best_time = str(times[row, best_index[position, row]])[11:16]
+            by_profile[name] = {
+                "best_time": best_time,
+                "beach_score": round(float(best_scores[position, row]), 1),
+                "hourly_scores": scores[position, row, :length].astype(np.float32),
+                "best_windows": best_windows[position * beaches + row]
+            }
+        default = by_profile[DEFAULT_PROFILE]
+        results.append({
+            "best_time": default["best_time"],
+            "beach_score": default["beach_score"],
+            "hourly_scores": default["hourly_scores"].tolist(),
+            "best_windows": default["best_windows"],
+            "profiles": by_profile
+        })
+    
+    SCORING_LATENCY.observe(time.perf_counter() - started)
+    return results
+
+def calculate_beach_recommendation(forecast_data: Dict, marine_data: Dict) -> tuple:
+    """Calculate the best beach time and overall beach score"""
+    try:
+        result = calculate_beach_scores([Forecast.from_json(forecast_data, FORECAST_HOURLY_VARIABLES)])[0]
+        return result["best_time"], result["beach_score"]
         
     except Exception as e:
         print(f"Error calculating beach recommendation: {e}")
@@ -217,104 +1406,1349 @@ def get_weather_description(weather_code: int) -> str:
     }
     return weather_codes.get(weather_code, "Unbekannt")
 
+def summarize_snapshot(beach_name: str, weather_data: Dict[str, Any], profile: str = DEFAULT_PROFILE) -> Dict[str, Any]:
+    """Compact summary of a snapshot, as used for recommendations and pushed updates"""
+    scores = profile_scores(weather_data, profile)
+    return {
+        "beach": beach_name,
+        "score": scores["beach_score"],
+        "best_time": scores["best_time"],
+        "best_windows": scores.get("best_windows", []),
+        "current_temp": weather_data["forecast"].hourly.value("temperature_2m", 0),
+        "current_weather": get_weather_description(weather_data["forecast"].hourly.value("weather_code", 0))
+    }
+
+def snapshot_age(snapshot: Dict[str, Any]) -> float:
+    """Seconds since the snapshot was fetched from upstream"""
+    return (datetime.now() - snapshot["timestamp"]).total_seconds()
+
+class SnapshotCache:
+    """In-process TTL/LRU cache of weather snapshots with single-flight loading"""
+    
+    def __init__(self, max_entries: int, ttl: float, max_staleness: float, on_evict=None, freshness=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_staleness = max_staleness
+        self.on_evict = on_evict
+        # Optional fetched_at -> seconds of freshness left, replacing the fixed TTL
+        self.freshness = freshness
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "loads": 0, "evictions": 0}
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+    
+    def fresh_for(self, snapshot: Dict[str, Any]) -> float:
+        """Seconds until an entry goes stale, zero or less once it has"""
+        if self.freshness is not None:
+            return self.freshness(snapshot["timestamp"])
+        return self.ttl - snapshot_age(snapshot)
+    
+    def is_fresh(self, snapshot: Dict[str, Any]) -> bool:
+        return self.fresh_for(snapshot) > 0
+    
+    def is_usable(self, snapshot: Optional[Dict[str, Any]]) -> bool:
+        return snapshot is not None and snapshot_age(snapshot) < self.max_staleness
+    
+    def peek(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return an entry without touching LRU order or counters"""
+        return self.entries.get(key)
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a usable entry (fresh or stale) and record the lookup"""
+        snapshot = self.entries.get(key)
+        if not self.is_usable(snapshot):
+            self.stats["misses"] += 1
+            return None
+        
+        self.entries.move_to_end(key)
+        self.stats["hits" if self.is_fresh(snapshot) else "stale_hits"] += 1
+        return snapshot
+    
+    def set(self, key: str, snapshot: Dict[str, Any]):
+        self.entries[key] = snapshot
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            evicted, _ = self.entries.popitem(last=False)
+            self.stats["evictions"] += 1
+            if self.on_evict:
+                self.on_evict(evicted)
+    
+    def load(self, keys: List[str], loader) -> Dict[str, asyncio.Task]:
+        """Start one loader task for keys not already loading; concurrent callers share it"""
+        pending = [key for key in keys if key not in self.inflight]
+        self.stats["coalesced"] += len(keys) - len(pending)
+        
+        if pending:
+            self.stats["loads"] += len(pending)
+            task = asyncio.create_task(loader(pending))
+            for key in pending:
+                self.inflight[key] = task
+            
+            def done(_task: asyncio.Task):
+                for key in pending:
+                    if self.inflight.get(key) is _task:
+                        del self.inflight[key]
+            
+            task.add_done_callback(done)
+        
+        return {key: self.inflight[key] for key in keys}
+
+# Monotonic time at which each cell should be refreshed next
+next_refresh_at: Dict[str, float] = {}
+
+def on_snapshot_evicted(cell: str):
+    # Evicted cells are reloaded on demand instead of kept warm by the scheduler
+    next_refresh_at[cell] = float("inf")
+
+class ModelRuns:
+    """Publication times of the upstream weather model runs, from Open-Meteo's per-model meta.json"""
+    
+    def __init__(self, urls: List[str]):
+        self.urls = urls
+        self.available_at: Dict[str, float] = {}
+        self.update_interval: Dict[str, float] = {}
+    
+    @property
+    def latest(self) -> Optional[float]:
+        """Unix time at which the newest known run became available, None without metadata"""
+        return max(self.available_at.values()) if self.available_at else None
+    
+    def next_run_in(self) -> Optional[float]:
+        """Seconds until the next run is expected, None if unknown or already overdue"""
+        expected = [
+            available_at + self.update_interval[url] - time.time()
+            for url, available_at in self.available_at.items() if self.update_interval.get(url)
+        ]
+        expected = [seconds for seconds in expected if seconds > 0]
+        return min(expected) if expected else None
+    
+    async def poll(self) -> bool:
+        """Fetch every model's metadata and report whether a newer run was published"""
+        latest = self.latest
+        for url in self.urls:
+            try:
+                status, meta = await fetch_upstream_json(url)
+                if status != 200:
+                    raise ValueError(f"status {status}")
+                self.available_at[url] = float(meta["last_run_availability_time"])
+                self.update_interval[url] = float(meta.get("update_interval_seconds") or 0)
+            except Exception as e:
+                print(f"Error reading model metadata from {url}: {e}")
+        return self.latest is not None and self.latest != latest
+
+model_runs = ModelRuns(MODEL_META_URLS)
+
+def forecast_fresh_for(fetched_at: datetime) -> float:
+    """Seconds a forecast fetched at fetched_at stays fresh: until a newer model run, capped by MODEL_REFRESH_MAX_AGE"""
+    age = (datetime.now() - fetched_at).total_seconds()
+    latest = model_runs.latest
+    if latest is None:
+        return WEATHER_CACHE_TTL - age
+    # Snapshot timestamps are naive local time, as is timestamp()'s interpretation of them
+    if fetched_at.timestamp() < latest:
+        return 0.0
+    return MODEL_REFRESH_MAX_AGE - age
+
+# Latest weather snapshot per grid cell, served by the endpoints
+weather_cache = SnapshotCache(
+    L1_MAX_ENTRIES, WEATHER_CACHE_TTL, SNAPSHOT_MAX_STALENESS, on_evict=on_snapshot_evicted, freshness=forecast_fresh_for
+)
+# Latest marine data per grid cell, loaded on demand only
+marine_cache = SnapshotCache(L1_MAX_ENTRIES, MARINE_CACHE_TTL, SNAPSHOT_MAX_STALENESS)
+
+def cached_marine(cell: str) -> Optional[Forecast]:
+    """The cell's marine data if a usable copy is cached, without fetching"""
+    marine_data = marine_cache.peek(cell)
+    return marine_data["marine"] if marine_cache.is_usable(marine_data) else None
+
+class WeatherBroadcaster:
+    """Fans out pre-encoded snapshot updates to Server-Sent Events subscribers"""
+    
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        # Subscribers per beach, plus those following every beach
+        self.by_beach: Dict[str, set] = {}
+        self.all_beaches: set = set()
+        # Last encoded event per beach, replayed to new subscribers
+        self.latest: Dict[str, bytes] = {}
+    
+    @property
+    def subscriber_count(self) -> int:
+        return len(self.all_beaches.union(*self.by_beach.values()))
+    
+    def subscribe(self, beach_names: Optional[List[str]]) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        if beach_names is None:
+            self.all_beaches.add(queue)
+        else:
+            for beach_name in beach_names:
+                self.by_beach.setdefault(beach_name, set()).add(queue)
+        return queue
+    
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.all_beaches.discard(queue)
+        for beach_name in list(self.by_beach):
+            self.by_beach[beach_name].discard(queue)
+            if not self.by_beach[beach_name]:
+                del self.by_beach[beach_name]
+    
+    def encode(self, beach_name: str, weather_data: Dict[str, Any]) -> bytes:
+        """Encode a snapshot as an SSE event once and remember it as the beach's latest"""
+        message = (
+            f"event: weather\nid: {beach_name}@{weather_data['timestamp'].isoformat()}\ndata: ".encode()
+            + orjson.dumps(summarize_snapshot(beach_name, weather_data))
+            + b"\n\n"
+        )
+        self.latest[beach_name] = message
+        return message
+    
+    def publish(self, beach_name: str, weather_data: Dict[str, Any]):
+        """Queue the same encoded update for every interested subscriber"""
+        message = self.encode(beach_name, weather_data)
+        for queue in self.all_beaches | self.by_beach.get(beach_name, set()):
+            if queue.full():
+                # Slow clients lose their oldest update rather than stalling the refresh
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+weather_broadcaster = WeatherBroadcaster(SSE_QUEUE_SIZE)
+
+class ScoreIndex:
+    """Recommendation entries kept ranked by score, updated incrementally as snapshots refresh"""
+    
+    def __init__(self):
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.keys: Dict[str, tuple] = {}
+        # Sorted (-score, beach) keys overall (None) and per region
+        self.ranked: Dict[Optional[str], List[tuple]] = {None: []}
+    
+    def __contains__(self, beach_name: str) -> bool:
+        return beach_name in self.entries
+    
+    def update(self, beach_name: str, entry: Dict[str, Any]):
+        self.remove(beach_name)
+        key = (-entry.get("score", 0), beach_name)
+        self.entries[beach_name] = entry
+        self.keys[beach_name] = key
+        for region in (None, BEACHES.get(beach_name, {}).get("region")):
+            bisect.insort(self.ranked.setdefault(region, []), key)
+    
+    def remove(self, beach_name: str):
+        key = self.keys.pop(beach_name, None)
+        if key is None:
+            return
+        del self.entries[beach_name]
+        for region in (None, BEACHES.get(beach_name, {}).get("region")):
+            ranked = self.ranked.get(region, [])
+            position = bisect.bisect_left(ranked, key)
+            if position < len(ranked) and ranked[position] == key:
+                del ranked[position]
+    
+    def query(self, region: Optional[str], limit: Optional[int], offset: int = 0, after: Optional[tuple] = None) -> tuple:
+        """Return (entries, total, last key) for one page of the ranking"""
+        ranked = self.ranked.get(region, [])
+        start = bisect.bisect_right(ranked, after) if after is not None else offset
+        end = len(ranked) if limit is None else start + limit
+        page = ranked[start:end]
+        return [self.entries[key[1]] for key in page], len(ranked), (page[-1] if page and end < len(ranked) else None)
+
+# One ranking per scoring profile
+score_indexes = {name: ScoreIndex() for name in SCORING.names}
+
+def index_snapshot(cell: str, weather_data: Dict[str, Any]):
+    """Update the recommendation rankings for every beach in a refreshed cell"""
+    for beach_name in CELL_BEACHES.get(cell, []):
+        for profile, score_index in score_indexes.items():
+            try:
+                score_index.update(beach_name, summarize_snapshot(beach_name, weather_data, profile))
+            except Exception as e:
+                score_index.update(beach_name, {"beach": beach_name, "score": 0, "error": str(e)})
+
+def store_snapshot(cell: str, weather_data: Dict[str, Any]):
+    """Publish a cell snapshot and schedule its refresh ahead of expiry, with jitter"""
+    weather_cache.set(cell, weather_data)
+    index_snapshot(cell, weather_data)
+    refresh_in = weather_cache.fresh_for(weather_data) * REFRESH_AHEAD_RATIO
+    next_refresh_at[cell] = time.monotonic() + max(0.0, refresh_in - random.uniform(0, REFRESH_JITTER))
+
+def store_and_publish(cell: str, weather_data: Dict[str, Any]) -> bool:
+    """Store a cell snapshot and push it to subscribers if its forecast differs from the L1 copy; returns whether it did"""
+    previous = weather_cache.peek(cell)
+    store_snapshot(cell, weather_data)
+    if previous is not None and previous["forecast"].digest == weather_data["forecast"].digest:
+        return False
+    for beach_name in CELL_BEACHES.get(cell, []):
+        weather_broadcaster.publish(beach_name, beach_view(beach_name, weather_data))
+    return True
+
+def rescored_with_marine(cell: str, weather_data: Dict[str, Any], marine: Forecast) -> Dict[str, Any]:
+    """A snapshot with its profiles rescored against marine data, unchanged if scoring fails"""
+    try:
+        profiles = calculate_beach_scores([weather_data["forecast"]], [marine])[0]["profiles"]
+    except Exception as e:
+        print(f"Error rescoring {cell} with marine data: {e}")
+        return weather_data
+    return {**weather_data, "profiles": profiles}
+
+def store_marine(cell: str, marine_data: Dict[str, Any]):
+    """Cache a cell's marine data and rescore its profiles that use marine variables"""
+    marine_cache.set(cell, marine_data)
+    weather_data = weather_cache.peek(cell)
+    if weather_data is None:
+        return
+    # Same snapshot version, so keep its position and refresh schedule
+    weather_data = rescored_with_marine(cell, weather_data, marine_data["marine"])
+    weather_cache.entries[cell] = weather_data
+    index_snapshot(cell, weather_data)
+
+def beach_view(beach_name: str, weather_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Present a shared cell snapshot as the weather data of one beach"""
+    return {"beach": beach_name, **weather_data, "stale": not weather_cache.is_fresh(weather_data)}
+
+# Snapshot keys for internal bookkeeping, or too large to send unasked (profiles, via fields=profiles)
+UNRENDERED_SNAPSHOT_FIELDS = {"cell", "modified_at", "profiles"}
+
+def render_snapshot(weather_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Full JSON shape of a snapshot, with forecast and marine (null when unavailable) as Open-Meteo returned them"""
+    marine = weather_data.get("marine")
+    return {
+        **{key: value for key, value in weather_data.items() if key not in UNRENDERED_SNAPSHOT_FIELDS},
+        "forecast": weather_data["forecast"].to_json(),
+        "marine": marine.to_json() if marine is not None else None
+    }
+
+def snapshot_document(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Mongo form of a weather or marine snapshot"""
+    document = dict(data)
+    if "forecast" in data:
+        document["forecast"] = data["forecast"].to_document()
+    if "marine" in data:
+        document["marine"] = data["marine"].to_document()
+    if "profiles" in data:
+        document["profiles"] = {
+            name: {**scores, "hourly_scores": Binary(scores["hourly_scores"].astype("<f4").tobytes())}
+            for name, scores in data["profiles"].items()
+        }
+    return document
+
+def snapshot_from_document(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Decode a weather or marine snapshot stored by snapshot_document"""
+    data = dict(document)
+    if "marine" in document:
+        data["marine"] = Forecast.from_document(document["marine"], MARINE_HOURLY_VARIABLES)
+    if "forecast" not in document:
+        return data
+    
+    data["forecast"] = Forecast.from_document(document["forecast"], FORECAST_HOURLY_VARIABLES)
+    # Older snapshots carried marine data inline; it is cached separately now
+    legacy_marine = data.pop("marine", None)
+    if "profiles" in document:
+        data["profiles"] = {
+            name: {**scores, "hourly_scores": np.frombuffer(scores["hourly_scores"], dtype="<f4").astype(np.float32)}
+            for name, scores in document["profiles"].items()
+        }
+    else:
+        # Documents from before scoring profiles are rescored once on load
+        data["profiles"] = calculate_beach_scores([data["forecast"]], [legacy_marine])[0]["profiles"]
+    return data
+
+def cache_expiry(weather_data: Dict[str, Any]) -> datetime:
+    # TTL indexes compare against UTC, independent of the local fetch timestamp
+    return datetime.utcnow() + timedelta(seconds=SNAPSHOT_MAX_STALENESS - snapshot_age(weather_data))
+
+def cache_document(cell: str, weather_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the Mongo cache document for a cell's latest snapshot"""
+    return {
+        "cell": cell,
+        "timestamp": weather_data["timestamp"],
+        "expires_at": cache_expiry(weather_data),
+        "data": snapshot_document(weather_data)
+    }
+
+# Hourly variables kept in the history store, by source
+HISTORY_VARIABLES = {
+    "forecast": ("temperature_2m", "precipitation_probability", "precipitation", "weather_code",
+                 "cloud_cover", "wind_speed_10m", "uv_index"),
+    "marine": ("wave_height", "sea_surface_temperature")
+}
+HISTORY_MAX_DAYS = int(os.environ.get('HISTORY_MAX_DAYS', '366'))
+
+def history_updates(cell: str, weather_data: Dict[str, Any]) -> List[UpdateOne]:
+    """Build per-day history upserts for the hours of a snapshot up to today"""
+    today = np.datetime64(datetime.now().date(), "D")
+    days: Dict[str, Dict[str, np.ndarray]] = {}
+    
+    for source, variables in HISTORY_VARIABLES.items():
+        # Forecast and marine snapshots each carry one of the sources
+        if source not in weather_data:
+            continue
+        series = weather_data[source].hourly
+        times = series.times
+        dates = times.astype("datetime64[D]")
+        hours = (times - dates).astype(int) // 60
+        # Future days are still forecasts and will be written once they arrive
+        for day in np.unique(dates[dates <= today]):
+            positions = np.flatnonzero(dates == day)
+            day_arrays = days.setdefault(str(day), {})
+            for name in variables:
+                values = series.variables.get(name)
+                if values is None:
+                    continue
+                in_series = positions[positions < len(values)]
+                day_arrays.setdefault(name, np.full(24, np.nan, dtype="<f4"))[hours[in_series]] = values[in_series]
+    
+    return [
+        UpdateOne(
+            {"cell": cell, "date": day},
+            {"$set": {
+                **{f"variables.{name}": Binary(values.tobytes()) for name, values in arrays.items()},
+                "updated_at": weather_data["timestamp"]
+            }},
+            upsert=True
+        )
+        for day, arrays in days.items()
+    ]
+
+async def acquire_leases(kind: str, cells: List[str]) -> List[str]:
+    """Claim refresh leadership for cells and return the ones this worker now holds"""
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=REFRESH_LEASE_SECONDS)
+    # An expired or own lease is taken over; a live foreign lease makes the upsert collide on _id
+    claims = [
+        UpdateOne(
+            {"_id": f"{kind}:{cell}", "$or": [{"expires_at": {"$lte": now}}, {"owner": WORKER_ID}]},
+            {"$set": {"owner": WORKER_ID, "expires_at": expires_at}},
+            upsert=True
+        )
+        for cell in cells
+    ]
+    try:
+        await lease_collection.bulk_write(claims, ordered=False)
+    except BulkWriteError as e:
+        lost = {error["index"] for error in e.details.get("writeErrors", []) if error.get("code") == 11000}
+        return [cell for index, cell in enumerate(cells) if index not in lost]
+    except Exception as e:
+        # Without Mongo there is nothing to coordinate through, so refresh locally
+        print(f"Error acquiring refresh leases: {e}")
+    return cells
+
+async def release_leases(kind: str, cells: List[str]):
+    if not cells:
+        return
+    try:
+        await lease_collection.delete_many({"_id": {"$in": [f"{kind}:{cell}" for cell in cells]}, "owner": WORKER_ID})
+    except Exception as e:
+        print(f"Error releasing refresh leases: {e}")
+
+async def adopt_newer(cells: List[str], collection, cache: SnapshotCache, store) -> Dict[str, Any]:
+    """Take over fresh snapshots that other workers wrote to Mongo since this worker's L1 copy"""
+    adopted = {}
+    try:
+        with timed("mongo_read"):
+            documents = await collection.find({"cell": {"$in": cells}}).to_list(None)
+    except Exception as e:
+        print(f"Error reading shared cache: {e}")
+        return adopted
+    
+    for cached_data in documents:
+        cell = cached_data["cell"]
+        current = cache.peek(cell)
+        if current is not None and cached_data["timestamp"] <= current["timestamp"]:
+            continue
+        if not cache.is_fresh(cached_data):
+            continue
+        data = snapshot_from_document(cached_data["data"])
+        store(cell, data)
+        adopted[cell] = data
+    return adopted
+
+async def coordinate_refresh(kind: str, cells: List[str], collection, cache: SnapshotCache, store) -> Tuple[List[str], Dict[str, Any]]:
+    """Split a refresh between workers; returns the cells to fetch here and results taken from other workers"""
+    leading = await acquire_leases(kind, cells)
+    # Another worker may have refreshed just before this one asked
+    results = await adopt_newer(cells, collection, cache, store)
+    if results:
+        await release_leases(kind, [cell for cell in leading if cell in results])
+    leading = [cell for cell in leading if cell not in results]
+    for _ in results:
+        REFRESH_COORDINATION.inc(kind, "adopted")
+    
+    # Followers wait briefly for the leader's write
+    following = [cell for cell in cells if cell not in results and cell not in leading]
+    deadline = time.monotonic() + REFRESH_LEASE_WAIT
+    while following and time.monotonic() < deadline:
+        await asyncio.sleep(REFRESH_LEASE_POLL)
+        followed = await adopt_newer(following, collection, cache, store)
+        results.update(followed)
+        following = [cell for cell in following if cell not in followed]
+        for _ in followed:
+            REFRESH_COORDINATION.inc(kind, "followed")
+    
+    for cell in following:
+        previous = cache.peek(cell)
+        if previous is not None:
+            # Keep serving the previous snapshot; the scheduler retries on its next tick
+            results[cell] = previous
+            REFRESH_COORDINATION.inc(kind, "previous")
+        else:
+            # Nothing to serve and the leader has not delivered, so fetch here after all
+            leading.append(cell)
+            REFRESH_COORDINATION.inc(kind, "fallback")
+    
+    for _ in leading:
+        REFRESH_COORDINATION.inc(kind, "led")
+    return leading, results
+
+async def refresh_cells(cells: List[str]) -> Dict[str, Any]:
+    """Fetch fresh data for the given cells, publish and cache every success"""
+    leading, coordinated = await coordinate_refresh("forecast", cells, weather_collection, weather_cache, store_and_publish)
+    try:
+        results = await fetch_all_cells(leading) if leading else {}
+        await write_refreshed_cells(results)
+    finally:
+        await release_leases("forecast", leading)
+    return {**coordinated, **results}
+
+async def write_refreshed_cells(results: Dict[str, Any]):
+    """Publish and cache freshly fetched snapshots"""
+    writes = []
+    changed = []
+    
+    for cell, weather_data in results.items():
+        if isinstance(weather_data, Exception):
+            print(f"Error refreshing {', '.join(CELL_BEACHES.get(cell, [cell]))}: {weather_data}")
+            # Retry failed cells on the next scheduler tick after a short back-off
+            next_refresh_at[cell] = time.monotonic() + REFRESH_TICK
+            # Beaches that already rank keep their last good entry
+            for beach_name in CELL_BEACHES.get(cell, []):
+                for score_index in score_indexes.values():
+                    if beach_name not in score_index:
+                        score_index.update(beach_name, {"beach": beach_name, "score": 0, "error": str(weather_data)})
+            continue
+        
+        if not store_and_publish(cell, weather_data):
+            # Same upstream data: only mark the shared copy as checked, so other workers see it fresh
+            REFRESH_RESULTS.inc("unchanged")
+            writes.append(UpdateOne({"cell": cell}, {"$set": {
+                "timestamp": weather_data["timestamp"],
+                "expires_at": cache_expiry(weather_data),
+                "data.timestamp": weather_data["timestamp"]
+            }}))
+            continue
+        
+        REFRESH_RESULTS.inc("changed")
+        changed.append(cell)
+        writes.append(ReplaceOne({"cell": cell}, cache_document(cell, weather_data), upsert=True))
+    
+    if writes:
+        try:
+            with timed("mongo_write"):
+                await weather_collection.bulk_write(writes, ordered=False)
+        except Exception as e:
+            print(f"Error caching weather data: {e}")
+        
+        try:
+            history_writes = [update for cell in changed for update in history_updates(cell, results[cell])]
+            if history_writes:
+                with timed("mongo_write"):
+                    await history_collection.bulk_write(history_writes, ordered=False)
+        except Exception as e:
+            print(f"Error writing weather history: {e}")
+
+async def load_cells(cells: List[str]) -> Dict[str, Any]:
+    """Resolve L1 misses from the Mongo cache, falling back to an upstream refresh"""
+    results = {}
+    try:
+        cutoff = datetime.now() - timedelta(seconds=SNAPSHOT_MAX_STALENESS)
+        with timed("mongo_read"):
+            documents = await weather_collection.find(
+                {"cell": {"$in": cells}, "timestamp": {"$gte": cutoff}}
+            ).to_list(None)
+        for cached_data in documents:
+            weather_data = snapshot_from_document(cached_data["data"])
+            # Stored profiles may predate the marine data cached since
+            marine = cached_marine(cached_data["cell"])
+            if marine is not None:
+                weather_data = rescored_with_marine(cached_data["cell"], weather_data, marine)
+            store_snapshot(cached_data["cell"], weather_data)
+            results[cached_data["cell"]] = weather_data
+            MONGO_CACHE_LOOKUPS.inc("hit" if weather_cache.is_fresh(weather_data) else "stale")
+    except Exception as e:
+        print(f"Error reading weather cache: {e}")
+    
+    missing = [cell for cell in cells if cell not in results]
+    if missing:
+        MONGO_CACHE_LOOKUPS.inc("miss", amount=len(missing))
+        results.update(await refresh_cells(missing))
+    
+    return results
+
+async def refresh_marine(cells: List[str]) -> Dict[str, Any]:
+    """Fetch fresh marine data for the given cells and cache every success"""
+    leading, coordinated = await coordinate_refresh("marine", cells, marine_collection, marine_cache, store_marine)
+    try:
+        results = await fetch_all_cells(leading, fetch_marine_batch) if leading else {}
+        await write_refreshed_marine(results)
+    finally:
+        await release_leases("marine", leading)
+    return {**coordinated, **results}
+
+async def write_refreshed_marine(results: Dict[str, Any]):
+    """Cache freshly fetched marine data"""
+    writes = []
+    
+    for cell, marine_data in results.items():
+        if isinstance(marine_data, Exception):
+            print(f"Error refreshing marine data for {', '.join(CELL_BEACHES.get(cell, [cell]))}: {marine_data}")
+            continue
+        store_marine(cell, marine_data)
+        writes.append(ReplaceOne({"cell": cell}, cache_document(cell, marine_data), upsert=True))
+    
+    if writes:
+        try:
+            with timed("mongo_write"):
+                await marine_collection.bulk_write(writes, ordered=False)
+        except Exception as e:
+            print(f"Error caching marine data: {e}")
+        
+        try:
+            history_writes = [
+                update
+                for cell, marine_data in results.items() if not isinstance(marine_data, Exception)
+                for update in history_updates(cell, marine_data)
+            ]
+            if history_writes:
+                with timed("mongo_write"):
+                    await history_collection.bulk_write(history_writes, ordered=False)
+        except Exception as e:
+            print(f"Error writing marine history: {e}")
+
+async def load_marine(cells: List[str]) -> Dict[str, Any]:
+    """Resolve marine L1 misses from the Mongo cache, falling back to an upstream refresh"""
+    results = {}
+    try:
+        cutoff = datetime.now() - timedelta(seconds=SNAPSHOT_MAX_STALENESS)
+        with timed("mongo_read"):
+            documents = await marine_collection.find(
+                {"cell": {"$in": cells}, "timestamp": {"$gte": cutoff}}
+            ).to_list(None)
+        for cached_data in documents:
+            marine_data = snapshot_from_document(cached_data["data"])
+            store_marine(cached_data["cell"], marine_data)
+            results[cached_data["cell"]] = marine_data
+    except Exception as e:
+        print(f"Error reading marine cache: {e}")
+    
+    # Stale Mongo copies are served but refreshed in the background
+    stale = [cell for cell, marine_data in results.items() if not marine_cache.is_fresh(marine_data)]
+    if stale:
+        marine_cache.load(stale, refresh_marine)
+    
+    missing = [cell for cell in cells if cell not in results]
+    if missing:
+        results.update(await refresh_marine(missing))
+    
+    return results
+
+def trigger_refresh(cells: List[str]) -> Dict[str, asyncio.Task]:
+    """Start a background refresh for cells that are not already being refreshed"""
+    return weather_cache.load(cells, refresh_cells)
+
+async def resolve_cells(cache: SnapshotCache, cells: List[str], loader, refresher) -> Dict[str, Any]:
+    """Return the latest entry per cell from a cache, serving stale data while it refreshes"""
+    results = {}
+    stale = []
+    missing = []
+    
+    for cell in cells:
+        snapshot = cache.get(cell)
+        if snapshot is None:
+            missing.append(cell)
+        else:
+            if not cache.is_fresh(snapshot):
+                stale.append(cell)
+            results[cell] = snapshot
+    
+    if stale:
+        cache.load(stale, refresher)
+    
+    # Only a cold or hopelessly outdated cell makes the caller wait, and
+    # concurrent misses for the same cell all wait on one load
+    if missing:
+        tasks = cache.load(missing, loader)
+        with timed("load"):
+            await asyncio.wait(set(tasks.values()))
+        for cell in missing:
+            task = tasks[cell]
+            results[cell] = task.exception() or task.result()[cell]
+            # During upstream incidents fall back to the last good snapshot, however old
+            if isinstance(results[cell], Exception) and cache.peek(cell) is not None:
+                results[cell] = cache.peek(cell)
+    
+    return results
+
+def warm_marine(cells: List[str]) -> Dict[str, asyncio.Task]:
+    """Start loading marine data for cells without fresh marine data; returns the loads of cells with none"""
+    missing = []
+    stale = []
+    for cell in cells:
+        marine_data = marine_cache.peek(cell)
+        if not marine_cache.is_usable(marine_data):
+            missing.append(cell)
+        elif not marine_cache.is_fresh(marine_data):
+            stale.append(cell)
+    if stale:
+        marine_cache.load(stale, refresh_marine)
+    return marine_cache.load(missing, load_marine) if missing else {}
+
+async def get_marine(cells: List[str]) -> Dict[str, Any]:
+    """Return the latest marine data per cell, loading it only for cells that are asked for"""
+    return await resolve_cells(marine_cache, list(dict.fromkeys(cells)), load_marine, refresh_marine)
+
+async def get_snapshots(beach_names: List[str]) -> Dict[str, Any]:
+    """Return the latest snapshot per beach, serving stale data while it refreshes"""
+    # Beaches in the same grid cell share one snapshot
+    cells = list(dict.fromkeys(BEACH_CELLS[name] for name in beach_names))
+    results = await resolve_cells(weather_cache, cells, load_cells, refresh_cells)
+    
+    snapshots = {}
+    for beach_name in beach_names:
+        weather_data = results[BEACH_CELLS[beach_name]]
+        snapshots[beach_name] = weather_data if isinstance(weather_data, Exception) else beach_view(beach_name, weather_data)
+    return snapshots
+
+def schedule_model_run():
+    """Bring forward the refresh of every cached snapshot that predates the latest model run"""
+    now = time.monotonic()
+    for cell, snapshot in weather_cache.entries.items():
+        if not weather_cache.is_fresh(snapshot):
+            # Jitter spreads the refetch of a new run like any other refresh
+            next_refresh_at[cell] = min(next_refresh_at.get(cell, now), now + random.uniform(0, REFRESH_JITTER))
+
+async def refresh_scheduler():
+    """Background loop that refreshes every grid cell before its snapshot expires or a new model run appears"""
+    next_model_poll = time.monotonic() + MODEL_META_POLL
+    if model_runs.urls:
+        await model_runs.poll()
+    tasks = weather_cache.load(list(CELLS.keys()), load_cells)
+    await asyncio.wait(set(tasks.values()))
+    
+    while True:
+        try:
+            now = time.monotonic()
+            if model_runs.urls and now >= next_model_poll:
+                next_model_poll = now + MODEL_META_POLL
+                if await model_runs.poll():
+                    schedule_model_run()
+                now = time.monotonic()
+            due = [
+                cell for cell in CELLS.keys()
+                if next_refresh_at.get(cell, 0) <= now
+            ]
+            if due:
+                trigger_refresh(due)
+        except Exception as e:
+            print(f"Error in refresh scheduler: {e}")
+        
+        await asyncio.sleep(REFRESH_TICK)
+
+# Snapshot fields that can be selected with fields= besides hourly series
+SUMMARY_FIELDS = ("best_time", "beach_score", "hourly_scores", "best_windows", "profiles")
+
+def parse_fields(fields: Optional[str]) -> Optional[set]:
+    """Parse a comma-separated fields= parameter; None selects everything"""
+    if not fields:
+        return None
+    return {field.strip() for field in fields.split(",") if field.strip()}
+
+def validate_fields(fields: Optional[set]):
+    """Reject fields= names that no snapshot can have"""
+    if fields is None:
+        return
+    known = (set(SUMMARY_FIELDS) | {"daily", "forecast", "marine"}
+             | set(FORECAST_HOURLY_VARIABLES) | set(MARINE_HOURLY_VARIABLES))
+    unknown = fields - known
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+def needs_marine(fields: Optional[set]) -> bool:
+    """Whether a fields= selection includes anything from the marine API"""
+    return fields is None or "marine" in fields or not fields.isdisjoint(MARINE_HOURLY_VARIABLES)
+
+def project_weather_data(weather_data: Dict[str, Any], fields: Optional[set] = None, compact: bool = False) -> Dict[str, Any]:
+    """Project a snapshot onto the requested fields, optionally in the compact columnar shape.
+
+    fields may name summary fields, "daily", "forecast", "marine" or any hourly
+    forecast or marine series. The compact shape puts every selected hourly
+    series on one shared time axis instead of nesting the raw Open-Meteo objects.
+    """
+    forecast = weather_data["forecast"]
+    # Marine data is None when it was not requested or could not be loaded
+    marine = weather_data.get("marine")
+    forecast_hourly = forecast.hourly
+    marine_hourly = marine.hourly if marine is not None else None
+    validate_fields(fields)
+    
+    def selected(name: str, block: Optional[str] = None) -> bool:
+        return fields is None or name in fields or (block is not None and block in fields)
+    
+    result = {"beach": weather_data["beach"], "timestamp": weather_data["timestamp"], "stale": weather_data.get("stale", False)}
+    for name in SUMMARY_FIELDS:
+        # Profiles are only sent when asked for by name
+        wanted = selected(name) if name not in UNRENDERED_SNAPSHOT_FIELDS else fields is not None and name in fields
+        if wanted and name in weather_data:
+            result[name] = weather_data[name]
+    
+    forecast_series = [name for name in forecast_hourly.variables if selected(name, "forecast")]
+    marine_series = [name for name in marine_hourly.variables if selected(name, "marine")] if marine is not None else []
+    include_daily = selected("daily", "forecast") and forecast.daily is not None
+    
+    if compact:
+        axis = forecast_hourly if len(forecast_hourly) or not marine_series else marine_hourly
+        hourly = {"time": axis.time_strings()}
+        for name in forecast_series:
+            hourly[name] = forecast_hourly.render(name)
+        if marine_series:
+            if (marine_hourly.start, marine_hourly.step, len(marine_hourly)) == (axis.start, axis.step, len(axis)):
+                for name in marine_series:
+                    hourly[name] = marine_hourly.render(name)
+            else:
+                # Align marine values onto the shared forecast time axis
+                positions = {t: i for i, t in enumerate(marine_hourly.times.tolist())}
+                indexes = [positions.get(t) for t in axis.times.tolist()]
+                for name in marine_series:
+                    hourly[name] = [None if i is None else marine_hourly.value(name, i) for i in indexes]
+        if forecast_series or marine_series:
+            result["hourly"] = hourly
+        if include_daily:
+            result["daily"] = forecast.daily
+        return result
+    
+    if forecast_series or include_daily:
+        projected = dict(forecast.meta)
+        if forecast_series:
+            projected["hourly"] = forecast_hourly.to_json(forecast_series)
+        if include_daily:
+            projected["daily"] = forecast.daily
+        result["forecast"] = projected
+    
+    if marine_series:
+        result["marine"] = {**marine.meta, "hourly": marine_hourly.to_json(marine_series)}
+    
+    return result
+
+async def get_beach_data(beach_names: List[str], fields: Optional[set]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Snapshots per beach plus marine data per cell, which is only loaded when fields need it"""
+    if not needs_marine(fields):
+        return await get_snapshots(beach_names), {}
+    snapshots, marine = await asyncio.gather(
+        get_snapshots(beach_names), get_marine([BEACH_CELLS[name] for name in beach_names])
+    )
+    for beach_name, weather_data in snapshots.items():
+        # Marine data that arrived meanwhile has rescored the cached snapshot
+        latest = weather_cache.peek(BEACH_CELLS[beach_name])
+        if not isinstance(weather_data, Exception) and latest is not None and latest["timestamp"] == weather_data["timestamp"]:
+            snapshots[beach_name] = {**weather_data, "profiles": latest["profiles"]}
+    # A marine outage leaves the forecast part of the response intact
+    return snapshots, {cell: None if isinstance(data, Exception) else data for cell, data in marine.items()}
+
+def with_marine(weather_data: Dict[str, Any], marine_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {**weather_data, "marine": marine_data["marine"] if marine_data else None}
+
+def render_beach_weather(weather_data: Dict[str, Any], marine_data: Optional[Dict[str, Any]],
+                         fields: Optional[set], compact: bool) -> Dict[str, Any]:
+    """Response shape of one beach's snapshot, projected when fields or the compact format are asked for"""
+    weather_data = with_marine(weather_data, marine_data)
+    if fields is not None or compact:
+        return project_weather_data(weather_data, fields, compact)
+    return render_snapshot(weather_data)
+
+def marine_version(marine_data: Optional[Dict[str, Any]]) -> Optional[str]:
+    return marine_data["marine"].digest.hex() if marine_data else None
+
+def modified_at(weather_data: Dict[str, Any], marine_data: Optional[Dict[str, Any]]) -> datetime:
+    """When a beach's forecast or marine content last changed; snapshots cached before this was tracked fall back to their timestamp"""
+    modified = weather_data.get("modified_at", weather_data["timestamp"])
+    if marine_data:
+        modified = max(modified, marine_data.get("modified_at", marine_data["timestamp"]))
+    return modified
+
+def snapshot_etag(*parts: Any) -> str:
+    """Weak ETag for a representation of one or more snapshot versions"""
+    digest = hashlib.blake2b("|".join(str(part) for part in parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+def cache_headers(etag: str, fetched_at: datetime, last_modified: datetime) -> Dict[str, str]:
+    """Validator and freshness headers; max-age runs until the oldest snapshot (fetched_at) expires"""
+    remaining = forecast_fresh_for(fetched_at)
+    if model_runs.latest is not None:
+        # A new run may turn up at the next metadata poll once the expected one is overdue
+        remaining = min(remaining, model_runs.next_run_in() or MODEL_META_POLL)
+    remaining = max(0, int(remaining))
+    return {
+        "ETag": etag,
+        # Snapshot timestamps are naive local time
+        "Last-Modified": format_datetime(last_modified.astimezone(timezone.utc), usegmt=True),
+        "Cache-Control": f"public, max-age={remaining}"
+    }
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    """Evaluate If-None-Match, or If-Modified-Since when no ETag was sent"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = {tag.strip() for tag in if_none_match.split(",")}
+        # Weak comparison, as required for GET
+        return "*" in candidates or etag in candidates or etag[2:] in candidates
+    
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            # asctime dates and the -0000 zone carry no offset; HTTP dates are always UTC
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.astimezone(timezone.utc).replace(microsecond=0) <= since
+    
+    return False
+
 @app.get("/")
 async def root():
     return {"message": "StrandWetter Deutschland API", "version": "1.0.0"}
 
+def beach_entry(beach_id: str) -> Dict[str, Any]:
+    """Public description of a registry beach"""
+    beach = BEACHES[beach_id]
+    return {
+        "id": beach_id,
+        "name": beach["name"],
+        "coordinates": {"lat": beach["latitude"], "lon": beach["longitude"]},
+        "region": beach["region"]
+    }
+
 @app.get("/api/beaches")
 async def get_beaches():
     """Get list of available beaches"""
+    return {
+        "beaches": [beach_entry(key) for key in BEACHES.keys()]
+    }
+
+@app.get("/api/beaches/nearby")
+async def get_nearby_beaches(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    k: int = Query(5, ge=1, le=100),
+    max_km: Optional[float] = Query(None, gt=0, le=20000)
+):
+    """Get the k beaches closest to a location, optionally within max_km"""
     return {
         "beaches": [
-            {"id": key, "name": value["name"], "coordinates": {"lat": value["latitude"], "lon": value["longitude"]}}
-            for key, value in BEACHES.items()
+            {**beach_entry(beach_id), "distance_km": round(distance, 2)}
+            for distance, beach_id in BEACH_INDEX.nearest(lat, lon, k, max_km)
         ]
     }
 
+@app.get("/api/beaches/bbox")
+async def get_beaches_in_bbox(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180)
+):
+    """Get all beaches inside a bounding box"""
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(status_code=400, detail="Invalid bounding box")
+    return {
+        "beaches": [beach_entry(beach_id) for beach_id in BEACH_INDEX.within(min_lat, min_lon, max_lat, max_lon)]
+    }
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Get in-process weather and marine cache counters"""
+    return {
+        "entries": len(weather_cache.entries),
+        "inflight": len(weather_cache.inflight),
+        **weather_cache.stats,
+        "marine": {
+            "entries": len(marine_cache.entries),
+            "inflight": len(marine_cache.inflight),
+            **marine_cache.stats
+        }
+    }
+
+@app.get("/api/upstream/stats")
+async def get_upstream_stats():
+    """Get circuit breaker and rate limiter state per upstream host"""
+    return {
+        host: {
+            "circuit": breaker.state,
+            "consecutive_failures": breaker.failures,
+            "tokens": round(rate_limiters[host].tokens, 2) if host in rate_limiters else None
+        }
+        for host, breaker in circuit_breakers.items()
+    }
+
+def collected_metrics() -> List[str]:
+    """Metrics read from existing state at scrape time rather than on the hot path"""
+    lines = ["# HELP strandwetter_memory_cache_events_total In-process snapshot cache events",
+             "# TYPE strandwetter_memory_cache_events_total counter"]
+    caches = {"weather": weather_cache, "marine": marine_cache}
+    lines += [f'strandwetter_memory_cache_events_total{{cache="{name}",event="{event}"}} {count}'
+              for name, cache in caches.items() for event, count in cache.stats.items()]
+    lines += ["# HELP strandwetter_memory_cache_entries Snapshots held in the in-process cache",
+              "# TYPE strandwetter_memory_cache_entries gauge"]
+    lines += [f'strandwetter_memory_cache_entries{{cache="{name}"}} {len(cache.entries)}' for name, cache in caches.items()]
+    lines += ["# HELP strandwetter_upstream_circuit_open Whether the circuit breaker for a host is open",
+              "# TYPE strandwetter_upstream_circuit_open gauge"]
+    lines += [f'strandwetter_upstream_circuit_open{{host="{host}"}} {int(breaker.state != "closed")}'
+              for host, breaker in circuit_breakers.items()]
+    lines += ["# HELP strandwetter_sse_subscribers Connected Server-Sent Events clients",
+              "# TYPE strandwetter_sse_subscribers gauge",
+              f"strandwetter_sse_subscribers {weather_broadcaster.subscriber_count}"]
+    return lines
+
+@app.get("/metrics")
+async def get_metrics():
+    """Expose metrics in the Prometheus text format"""
+    lines = []
+    for metric in METRICS:
+        lines.append(f"# HELP {metric.name} {metric.help_text}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    lines.extend(collected_metrics())
+    return Response("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/api/weather/{beach_name}")
-async def get_beach_weather(beach_name: str):
+async def get_beach_weather(
+    request: Request,
+    beach_name: str,
+    window_hours: Optional[int] = Query(None, ge=1, le=15),
+    fields: Optional[str] = None,
+    format: str = Query("full", pattern="^(full|compact)$")
+):
     """Get current weather data for a specific beach"""
     if beach_name not in BEACHES:
         raise HTTPException(status_code=404, detail="Beach not found")
     
     try:
-        # Check cache first
-        cached_data = await weather_collection.find_one(
-            {"beach": beach_name},
-            sort=[("timestamp", -1)]
+        cell = BEACH_CELLS[beach_name]
+        selected_fields = parse_fields(fields)
+        cached = weather_cache.is_usable(weather_cache.peek(cell))
+        snapshots, marine = await get_beach_data([beach_name], selected_fields)
+        weather_data = snapshots[beach_name]
+        if isinstance(weather_data, Exception):
+            raise weather_data
+        
+        stale = not weather_cache.is_fresh(weather_data)
+        # Validators follow the content, so refreshes that bring back the same data keep them
+        last_modified = modified_at(weather_data, marine.get(cell))
+        headers = cache_headers(
+            snapshot_etag(
+                beach_name, weather_data["forecast"].digest.hex(), marine_version(marine.get(cell)), fields, format, window_hours
+            ),
+            weather_data["timestamp"],
+            last_modified
         )
+        if is_not_modified(request, headers["ETag"], last_modified):
+            return Response(status_code=304, headers=headers)
         
-        # Use cached data if it's less than 30 minutes old
-        if cached_data and (datetime.now() - cached_data["timestamp"]).seconds < 1800:
-            # Remove MongoDB ObjectId before returning
-            cached_data.pop('_id', None)
-            return {
-                "beach": beach_name,
-                "data": cached_data["data"],
-                "cached": True
-            }
+        if window_hours and window_hours != BEST_WINDOW_HOURS:
+            weather_data = {**weather_data, "best_windows": calculate_snapshot_windows(weather_data, window_hours)}
         
-        # Fetch fresh data
-        weather_data = await fetch_weather_data(beach_name, BEACHES[beach_name])
+        weather_data = render_beach_weather(weather_data, marine.get(cell), selected_fields, format == "compact")
         
-        # Cache the data
-        await weather_collection.insert_one({
-            "beach": beach_name,
-            "timestamp": datetime.now(),
-            "data": weather_data
-        })
-        
-        return {
+        # Snapshots are plain JSON types, so skip the generic encoder and let orjson render them
+        return ORJSONResponse({
             "beach": beach_name,
             "data": weather_data,
-            "cached": False
-        }
+            "cached": cached,
+            "stale": stale
+        }, headers=headers)
         
+    except HTTPException as e:
+        if e.status_code == 400:
+            raise
+        raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/weather")
-async def get_all_beaches_weather():
+async def get_all_beaches_weather(
+    request: Request,
+    fields: Optional[str] = None,
+    format: str = Query("full", pattern="^(full|compact)$")
+):
     """Get weather data for all beaches"""
     results = {}
+    selected_fields = parse_fields(fields)
+    snapshots, marine = await get_beach_data(list(BEACHES.keys()), selected_fields)
+    
+    # Errors are not cacheable, so only fully successful responses get validators
+    headers = {}
+    if snapshots and not any(isinstance(data, Exception) for data in snapshots.values()):
+        newest = max(modified_at(data, marine.get(BEACH_CELLS[name])) for name, data in snapshots.items())
+        headers = cache_headers(
+            snapshot_etag(
+                *(f"{name}@{data['forecast'].digest.hex()}" for name, data in snapshots.items()),
+                *(f"{cell}~{marine_version(data)}" for cell, data in marine.items()),
+                fields, format
+            ),
+            min(data["timestamp"] for data in snapshots.values()),
+            newest
+        )
+        if is_not_modified(request, headers["ETag"], newest):
+            return Response(status_code=304, headers=headers)
+    
+    for beach_name, weather_data in snapshots.items():
+        if isinstance(weather_data, Exception):
+            results[beach_name] = {"error": str(weather_data)}
+            continue
+        results[beach_name] = render_beach_weather(
+            weather_data, marine.get(BEACH_CELLS[beach_name]), selected_fields, format == "compact"
+        )
+    
+    return ORJSONResponse(results, headers=headers)
+
+@app.post("/api/weather/batch")
+async def stream_weather_batch(batch: WeatherBatchRequest):
+    """Stream weather data for a list of beaches as NDJSON, one line per beach as soon as it is ready"""
+    selected_fields = parse_fields(batch.fields)
+    # Headers are gone once the first line is out, so reject bad input up front
+    validate_fields(selected_fields)
+    compact = batch.format == "compact"
+    beach_names = list(dict.fromkeys(batch.beaches))
+    known = [name for name in beach_names if name in BEACHES]
+    
+    # Beaches that share a cell are resolved together; cached cells stream immediately and
+    # misses are loaded in upstream-sized chunks that complete independently
+    by_cell: Dict[str, List[str]] = {}
+    for beach_name in known:
+        by_cell.setdefault(BEACH_CELLS[beach_name], []).append(beach_name)
+    usable = {cell: weather_cache.is_usable(weather_cache.peek(cell)) for cell in by_cell}
+    cached = [cell for cell in by_cell if usable[cell]]
+    missing = [cell for cell in by_cell if not usable[cell]]
+    chunks = [
+        group[i:i + UPSTREAM_BATCH_SIZE]
+        for group in (cached, missing) for i in range(0, len(group), UPSTREAM_BATCH_SIZE)
+    ]
     
-    for beach_name in BEACHES.keys():
+    def line(entry: Dict[str, Any]) -> bytes:
+        # Snapshots hold numpy arrays, which ORJSONResponse would otherwise serialize for us
+        return orjson.dumps(entry, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) + b"\n"
+    
+    async def load_chunk(chunk: List[str]):
+        names = [beach_name for cell in chunk for beach_name in by_cell[cell]]
         try:
-            weather_data = await fetch_weather_data(beach_name, BEACHES[beach_name])
-            results[beach_name] = weather_data
+            return names, await get_beach_data(names, selected_fields)
         except Exception as e:
-            results[beach_name] = {"error": str(e)}
+            return names, e
     
-    return results
+    async def lines():
+        for beach_name in beach_names:
+            if beach_name not in BEACHES:
+                yield line({"beach": beach_name, "error": "Beach not found"})
+        
+        tasks = [asyncio.ensure_future(load_chunk(chunk)) for chunk in chunks]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                names, loaded = await next_done
+                for beach_name in names:
+                    if isinstance(loaded, Exception):
+                        yield line({"beach": beach_name, "error": str(loaded)})
+                        continue
+                    snapshots, marine = loaded
+                    weather_data = snapshots[beach_name]
+                    if isinstance(weather_data, Exception):
+                        yield line({"beach": beach_name, "error": str(weather_data)})
+                        continue
+                    try:
+                        data = render_beach_weather(weather_data, marine.get(BEACH_CELLS[beach_name]), selected_fields, compact)
+                    except Exception as e:
+                        yield line({"beach": beach_name, "error": str(e)})
+                        continue
+                    yield line({"beach": beach_name, "data": data, "stale": not weather_cache.is_fresh(weather_data)})
+        finally:
+            # A client that hangs up stops waiting on loads; shared cache loads keep running
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"}
+    )
+
+def encode_cursor(key: tuple) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps(list(key))).decode()
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        score, beach_name = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(score), str(beach_name)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 @app.get("/api/recommendations")
-async def get_beach_recommendations():
-    """Get beach recommendations for all beaches"""
-    recommendations = []
+async def get_beach_recommendations(
+    window_hours: Optional[int] = Query(None, ge=1, le=15),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    region: Optional[str] = None,
+    profile: str = DEFAULT_PROFILE
+):
+    """Get beach recommendations, best first, from the incrementally maintained score index of a profile"""
+    score_index = score_indexes.get(profile)
+    if score_index is None:
+        raise HTTPException(status_code=400, detail=f"Unknown profile; choose one of: {', '.join(SCORING.names)}")
+    
+    # Beaches without data are loaded in the background; a cold worker waits briefly for
+    # that load and reports the beaches still missing as pending
+    if len(score_index.entries) < len(BEACHES):
+        loading = trigger_refresh([
+            cell for cell, beach_names in CELL_BEACHES.items()
+            if any(name not in score_index for name in beach_names)
+        ])
+        if loading and RECOMMENDATIONS_WARMUP_WAIT > 0:
+            await asyncio.wait(set(loading.values()), timeout=RECOMMENDATIONS_WARMUP_WAIT)
+    pending = len(BEACHES) - len(score_index.entries)
+    
+    # Marine bands score zero until the marine data arrives, which then rescores and reranks the cell
+    marine_pending = set()
+    if profile in MARINE_PROFILES:
+        marine_pending = set(warm_marine(list(CELLS.keys())))
     
-    for beach_name in BEACHES.keys():
+    recommendations, total, last_key = score_index.query(
+        region, limit, offset, decode_cursor(cursor) if cursor else None
+    )
+    if marine_pending:
+        recommendations = [
+            {**entry, "marine_pending": True} if BEACH_CELLS[entry["beach"]] in marine_pending else entry
+            for entry in recommendations
+        ]
+    
+    if window_hours and window_hours != BEST_WINDOW_HOURS:
+        recommendations = [
+            {**entry, "best_windows": calculate_snapshot_windows(snapshot, window_hours, profile)}
+            if (snapshot := weather_cache.peek(BEACH_CELLS[entry["beach"]])) and "error" not in entry
+            else entry
+            for entry in recommendations
+        ]
+    
+    return {
+        "profile": profile,
+        "recommendations": recommendations,
+        "total": total,
+        "pending": pending,
+        "marine_pending": sum(len(CELL_BEACHES[cell]) for cell in marine_pending),
+        "next_cursor": encode_cursor(last_key) if last_key else None
+    }
+
+@app.get("/api/history/{beach_name}")
+async def get_beach_history(
+    beach_name: str,
+    start: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    end: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    variables: Optional[str] = None,
+    resolution: int = Query(1, ge=1, le=24, description="Hours per point"),
+    aggregate: str = Query("mean", pattern="^(mean|min|max)$")
+):
+    """Get hourly history for a beach, downsampled server-side"""
+    if beach_name not in BEACHES:
+        raise HTTPException(status_code=404, detail="Beach not found")
+    if 24 % resolution:
+        raise HTTPException(status_code=400, detail="resolution must divide 24")
+    
+    known = [name for names in HISTORY_VARIABLES.values() for name in names]
+    selected = [name.strip() for name in variables.split(",")] if variables else known
+    unknown = [name for name in selected if name not in known]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown variables: {', '.join(unknown)}")
+    
+    try:
+        end_date = datetime.strptime(end, "%Y-%m-%d").date() if end else datetime.now().date()
+        start_date = datetime.strptime(start, "%Y-%m-%d").date() if start else end_date - timedelta(days=6)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    days = (end_date - start_date).days + 1
+    if days < 1 or days > HISTORY_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range must cover 1 to {HISTORY_MAX_DAYS} days")
+    
+    # Day x hour matrix per variable; days without data stay NaN
+    matrix = {name: np.full((days, 24), np.nan, dtype=np.float32) for name in selected}
+    try:
+        async for document in history_collection.find(
+            {"cell": BEACH_CELLS[beach_name], "date": {"$gte": start_date.isoformat(), "$lte": end_date.isoformat()}},
+            {f"variables.{name}": 1 for name in selected} | {"date": 1, "_id": 0}
+        ):
+            row = (datetime.strptime(document["date"], "%Y-%m-%d").date() - start_date).days
+            for name, raw in document.get("variables", {}).items():
+                matrix[name][row] = np.frombuffer(raw, dtype="<f4")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    reducer = {"mean": np.nanmean, "min": np.nanmin, "max": np.nanmax}[aggregate]
+    series = {}
+    with warnings.catch_warnings():
+        # Buckets without any data are expected and become null
+        warnings.simplefilter("ignore", RuntimeWarning)
+        for name, values in matrix.items():
+            reduced = reducer(values.reshape(-1, resolution), axis=1)
+            series[name] = [None if np.isnan(value) else round(float(value), 2) for value in reduced]
+    
+    first = datetime.combine(start_date, datetime.min.time())
+    return ORJSONResponse({
+        "beach": beach_name,
+        "start": start_date.isoformat(),
+        "end": end_date.isoformat(),
+        "resolution_hours": resolution,
+        "aggregate": aggregate,
+        "time": [(first + timedelta(hours=hour)).strftime("%Y-%m-%dT%H:%M") for hour in range(0, days * 24, resolution)],
+        "variables": series
+    })
+
+@app.get("/api/stream")
+async def stream_weather_updates(beaches: Optional[str] = None):
+    """Stream snapshot updates as Server-Sent Events, optionally for selected beaches only"""
+    beach_names = None
+    if beaches:
+        beach_names = [name.strip() for name in beaches.split(",") if name.strip()]
+        unknown = [name for name in beach_names if name not in BEACHES]
+        if unknown:
+            raise HTTPException(status_code=404, detail=f"Beach not found: {', '.join(unknown)}")
+    
+    queue = weather_broadcaster.subscribe(beach_names)
+    
+    async def event_stream():
         try:
-            weather_data = await fetch_weather_data(beach_name, BEACHES[beach_name])
+            # Start every client from the current state, reusing the already encoded events
+            for beach_name in beach_names or list(BEACHES.keys()):
+                message = weather_broadcaster.latest.get(beach_name)
+                if message is None and BEACH_CELLS[beach_name] in weather_cache:
+                    message = weather_broadcaster.encode(
+                        beach_name, beach_view(beach_name, weather_cache.peek(BEACH_CELLS[beach_name]))
+                    )
+                if message is not None:
+                    yield message
             
-            recommendations.append({
-                "beach": beach_name,
-                "score": weather_data["beach_score"],
-                "best_time": weather_data["best_time"],
-                "current_temp": weather_data["forecast"]["hourly"]["temperature_2m"][0],
-                "current_weather": get_weather_description(weather_data["forecast"]["hourly"]["weather_code"][0])
-            })
-            
-        except Exception as e:
-            recommendations.append({
-                "beach": beach_name,
-                "score": 0,
-                "error": str(e)
-            })
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield b": heartbeat\n\n"
+        finally:
+            weather_broadcaster.unsubscribe(queue)
     
-    # Sort by score (highest first)
-    recommendations.sort(key=lambda x: x.get("score", 0), reverse=True)
-    
-    return {"recommendations": recommendations}
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+ROUTE_TEMPLATES.update({route.endpoint: route.path for route in app.routes if hasattr(route, "endpoint")})
 
 if __name__ == "__main__":
     import uvicorn
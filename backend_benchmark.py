@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Offline Benchmark Suite for StrandWetter Deutschland
+Runs the backend against a local Open-Meteo stand-in and an in-memory Mongo,
+drives the main endpoints at a fixed concurrency and reports latency percentiles
+
+Usage:
+    python backend_benchmark.py --concurrency 32 --requests 1000
+    python backend_benchmark.py --cache-ttl 0 --upstream-error-rate 0.05 \
+        --compare benchmarks/<earlier run>.json --max-regression 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+import aiohttp
+from aiohttp import web
+import numpy as np
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+
+ENDPOINTS = ["/api/weather", "/api/weather/{beach}", "/api/recommendations"]
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the StrandWetter backend offline")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="Comma-separated endpoints to drive")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent client connections")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per endpoint")
+    parser.add_argument("--upstream-latency", type=float, default=0.05, help="Mean mock upstream latency in seconds")
+    parser.add_argument("--upstream-jitter", type=float, default=0.02, help="Uniform jitter added to upstream latency")
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0, help="Fraction of upstream requests answered with 503")
+    parser.add_argument("--forecast-days", type=int, default=3, help="Days of hourly data in mock payloads")
+    parser.add_argument("--cache-ttl", type=int, default=None, help="Override the weather and marine cache TTLs to force refreshes")
+    parser.add_argument("--mongo", default="mock", help="'mock' for mongomock-motor or a MongoDB URL")
+    parser.add_argument("--port", type=int, default=18080, help="Port for the backend under test")
+    parser.add_argument("--upstream-port", type=int, default=18081, help="Port for the Open-Meteo stand-in")
+    parser.add_argument("--output", default=None, help="Result file (default: benchmarks/<timestamp>-<commit>.json)")
+    parser.add_argument("--compare", default=None, help="Earlier result file to compare against")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="Fail if p95 latency or throughput regresses by more than this percentage")
+    return parser.parse_args()
+
+class MockOpenMeteo:
+    """Local stand-in for the forecast and marine APIs with configurable latency and errors"""
+
+    def __init__(self, latency: float, jitter: float, error_rate: float, forecast_days: int):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.forecast_days = forecast_days
+        self.requests = 0
+        self.errors = 0
+
+    def hourly(self, variables: List[str], rng: random.Random) -> Dict[str, List]:
+        start = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=datetime.now().hour)
+        hours = self.forecast_days * 24
+        data = {"time": [(start + timedelta(hours=hour)).strftime("%Y-%m-%dT%H:%M") for hour in range(hours)]}
+        for name in variables:
+            if name == "weather_code":
+                data[name] = [rng.choice([0, 1, 2, 3, 45, 61, 80]) for _ in range(hours)]
+            elif name == "is_day":
+                data[name] = [int(6 <= hour % 24 <= 20) for hour in range(hours)]
+            else:
+                data[name] = [round(rng.uniform(0, 30), 1) for _ in range(hours)]
+        return data
+
+    def daily(self, variables: List[str], rng: random.Random) -> Dict[str, List]:
+        today = datetime.now().date()
+        days = [(today + timedelta(days=day)).isoformat() for day in range(self.forecast_days)]
+        data = {"time": days}
+        for name in variables:
+            if name in ("sunrise", "sunset"):
+                data[name] = [f"{day}T{'06:30' if name == 'sunrise' else '19:45'}" for day in days]
+            elif name == "weather_code":
+                data[name] = [rng.choice([0, 1, 2, 3, 61]) for _ in days]
+            else:
+                data[name] = [round(rng.uniform(0, 30), 1) for _ in days]
+        return data
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        await asyncio.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        if random.random() < self.error_rate:
+            self.errors += 1
+            return web.json_response({"error": True, "reason": "mock upstream failure"}, status=503)
+
+        latitudes = request.query["latitude"].split(",")
+        longitudes = request.query["longitude"].split(",")
+        hourly = request.query.get("hourly", "").split(",")
+        daily = [name for name in request.query.get("daily", "").split(",") if name]
+
+        locations = []
+        for latitude, longitude in zip(latitudes, longitudes):
+            # Stable payload per location so repeated runs score the same
+            rng = random.Random(f"{request.path}:{latitude}:{longitude}")
+            location = {"latitude": float(latitude), "longitude": float(longitude), "hourly": self.hourly(hourly, rng)}
+            if daily:
+                location["daily"] = self.daily(daily, rng)
+            locations.append(location)
+        return web.json_response(locations if len(locations) > 1 else locations[0])
+
+    async def start(self, port: int) -> web.AppRunner:
+        app = web.Application()
+        app.router.add_get("/v1/forecast", self.handle)
+        app.router.add_get("/v1/marine", self.handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        return runner
+
+def configure_environment(args: argparse.Namespace):
+    """Point the backend at the stand-in before it is imported"""
+    os.environ["FORECAST_API_URL"] = f"http://127.0.0.1:{args.upstream_port}/v1/forecast"
+    os.environ["MARINE_API_URL"] = f"http://127.0.0.1:{args.upstream_port}/v1/marine"
+    # The client-side rate limit and the background scheduler would skew the measurement
+    os.environ.setdefault("UPSTREAM_RATE_LIMIT", "0")
+    os.environ.setdefault("REFRESH_SCHEDULER_ENABLED", "false")
+    if args.cache_ttl is not None:
+        os.environ["WEATHER_CACHE_TTL"] = str(args.cache_ttl)
+        os.environ["MARINE_CACHE_TTL"] = str(args.cache_ttl)
+    if args.mongo != "mock":
+        os.environ["MONGO_URL"] = args.mongo
+    sys.path.insert(0, BACKEND_DIR)
+
+def use_mock_mongo(server):
+    """Swap every Motor collection on the server module for an in-memory one"""
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        sys.exit("mongomock-motor is required for --mongo mock (pip install mongomock-motor)")
+
+    server.client = AsyncMongoMockClient()
+    server.db = server.client[server.db.name]
+    for name, value in list(vars(server).items()):
+        if type(value).__name__ == "AsyncIOMotorCollection":
+            setattr(server, name, server.db[value.name])
+
+def percentile(latencies: List[float], q: float) -> float:
+    return round(float(np.percentile(latencies, q)) * 1000, 2) if latencies else 0.0
+
+async def drive(session: aiohttp.ClientSession, base_url: str, endpoint: str, beaches: List[str],
+                total: int, concurrency: int) -> Dict[str, Any]:
+    """Issue `total` requests against one endpoint from `concurrency` workers"""
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    counter = iter(range(total))
+
+    async def worker():
+        for sequence in counter:
+            path = endpoint.format(beach=beaches[sequence % len(beaches)])
+            started = time.perf_counter()
+            try:
+                async with session.get(base_url + path) as response:
+                    await response.read()
+                    status = str(response.status)
+            except aiohttp.ClientError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": total,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 1),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": round(max(latencies) * 1000, 2) if latencies else 0.0,
+        "statuses": statuses
+    }
+
+def current_commit() -> str:
+    try:
+        # Resolve against the repository this script lives in, wherever it is run from
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    configure_environment(args)
+    import server
+    import uvicorn
+    if args.mongo == "mock":
+        use_mock_mongo(server)
+
+    upstream = MockOpenMeteo(args.upstream_latency, args.upstream_jitter, args.upstream_error_rate, args.forecast_days)
+    upstream_runner = await upstream.start(args.upstream_port)
+
+    backend = uvicorn.Server(uvicorn.Config(server.app, host="127.0.0.1", port=args.port, log_level="warning"))
+    backend_task = asyncio.create_task(backend.serve())
+    while not backend.started:
+        if backend_task.done():
+            await backend_task
+            sys.exit("Backend failed to start")
+        await asyncio.sleep(0.05)
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    beaches = list(server.BEACHES)
+    results = {}
+    try:
+        connector = aiohttp.TCPConnector(limit=args.concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            for endpoint in [name.strip() for name in args.endpoints.split(",") if name.strip()]:
+                upstream_before = upstream.requests
+                print(f"⏱️  {endpoint}: {args.requests} requests at concurrency {args.concurrency}")
+                results[endpoint] = await drive(session, base_url, endpoint, beaches, args.requests, args.concurrency)
+                results[endpoint]["upstream_requests"] = upstream.requests - upstream_before
+    finally:
+        backend.should_exit = True
+        await backend_task
+        await upstream_runner.cleanup()
+
+    return {
+        "commit": current_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "upstream": {"requests": upstream.requests, "errors": upstream.errors},
+        "endpoints": results
+    }
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n📊 Results for {report['commit']} ({report['timestamp']})")
+    print(f"{'endpoint':<26}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'upstream':>10}  statuses")
+    for endpoint, result in report["endpoints"].items():
+        print(f"{endpoint:<26}{result['throughput_rps']:>10}{result['p50_ms']:>10}{result['p95_ms']:>10}"
+              f"{result['p99_ms']:>10}{result['upstream_requests']:>10}  {result['statuses']}")
+
+def compare(report: Dict[str, Any], baseline_path: str, max_regression: Optional[float]) -> bool:
+    """Print deltas against an earlier run; return False when a regression exceeds the threshold"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    print(f"\n🔍 Compared with {baseline['commit']} ({baseline['timestamp']})")
+    ok = True
+    for endpoint, result in report["endpoints"].items():
+        previous = baseline["endpoints"].get(endpoint)
+        if not previous:
+            continue
+        deltas = {}
+        for metric, higher_is_better in (("throughput_rps", True), ("p50_ms", False), ("p95_ms", False), ("p99_ms", False)):
+            if previous[metric]:
+                change = (result[metric] - previous[metric]) / previous[metric] * 100
+                deltas[metric] = change
+                print(f"  {endpoint:<26}{metric:<16}{previous[metric]:>10} → {result[metric]:<10}({change:+.1f}%)")
+        if max_regression is not None and (
+            deltas.get("p95_ms", 0) > max_regression or deltas.get("throughput_rps", 0) < -max_regression
+        ):
+            print(f"  ❌ {endpoint} regressed by more than {max_regression}%")
+            ok = False
+    return ok
+
+def main():
+    args = parse_args()
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{report['commit']}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Saved results to {output}")
+
+    if args.compare and not compare(report, args.compare, args.max_regression):
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
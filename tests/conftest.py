@@ -0,0 +1,96 @@
+import asyncio
+import os
+import sys
+import urllib.parse
+from datetime import datetime, timedelta
+
+import pytest
+
+# The backend is a single module rather than an installed package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+
+class FakeOpenMeteo:
+    """Deterministic stand-in for the forecast and marine APIs, answering fetch_upstream_json calls"""
+
+    def __init__(self):
+        self.calls = []
+        self.delay = 0.0
+        self.marine_available = True
+        self.start = datetime.now().replace(minute=0, second=0, microsecond=0)
+
+    def location(self, kind, latitude, longitude):
+        times = [(self.start + timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M") for i in range(72)]
+        # Values vary by hour and location but repeat across calls
+        wave = [((i * 7 + int(latitude * 100)) % 20) / 10 for i in range(72)]
+        if kind == "marine":
+            return {"latitude": latitude, "longitude": longitude, "hourly": {
+                "time": times, "wave_height": wave, "wave_direction": [180] * 72, "wave_period": [4.0] * 72,
+                "sea_surface_temperature": [14 + (i + int(longitude * 100)) % 8 for i in range(72)]
+            }}
+        days = [(self.start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(3)]
+        return {"latitude": latitude, "longitude": longitude, "hourly": {
+            "time": times,
+            "temperature_2m": [16 + (i * 3 + int(latitude * 10)) % 14 for i in range(72)],
+            "precipitation_probability": [(i * 11) % 60 for i in range(72)],
+            "precipitation": [0.0] * 72,
+            "weather_code": [i % 4 for i in range(72)],
+            "cloud_cover": [(i * 13) % 100 for i in range(72)],
+            "wind_speed_10m": [(i * 5 + int(longitude * 10)) % 30 for i in range(72)],
+            "uv_index": [(i % 24) / 3 for i in range(72)],
+            "is_day": [int(6 <= i % 24 <= 20) for i in range(72)]
+        }, "daily": {"time": days, "weather_code": [1, 2, 3]}}
+
+    async def fetch(self, url):
+        kind = "marine" if "marine" in url else "forecast"
+        self.calls.append(kind)
+        await asyncio.sleep(self.delay)
+        if kind == "marine" and not self.marine_available:
+            raise RuntimeError("marine API down")
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(url).query)
+        locations = [
+            self.location(kind, float(latitude), float(longitude))
+            for latitude, longitude in zip(query["latitude"][0].split(","), query["longitude"][0].split(","))
+        ]
+        return 200, locations if len(locations) > 1 else locations[0]
+
+
+@pytest.fixture
+def upstream():
+    return FakeOpenMeteo()
+
+
+@pytest.fixture
+def backend(monkeypatch, upstream):
+    """The backend module wired to the fake upstream and an in-memory Mongo, with empty caches"""
+    import server
+    from mongomock_motor import AsyncMongoMockClient
+
+    db = AsyncMongoMockClient().strandwetter
+    for name in ("weather_collection", "marine_collection", "history_collection", "lease_collection"):
+        monkeypatch.setattr(server, name, db[getattr(server, name).name])
+    monkeypatch.setattr(server, "fetch_upstream_json", upstream.fetch)
+    monkeypatch.setattr(server, "REFRESH_SCHEDULER_ENABLED", False)
+    monkeypatch.setattr(server, "model_runs", server.ModelRuns([]))
+    monkeypatch.setattr(server, "next_refresh_at", {})
+    monkeypatch.setattr(server, "weather_cache", server.SnapshotCache(
+        server.L1_MAX_ENTRIES, server.WEATHER_CACHE_TTL, server.SNAPSHOT_MAX_STALENESS,
+        on_evict=server.on_snapshot_evicted, freshness=server.forecast_fresh_for
+    ))
+    monkeypatch.setattr(server, "marine_cache", server.SnapshotCache(
+        server.L1_MAX_ENTRIES, server.MARINE_CACHE_TTL, server.SNAPSHOT_MAX_STALENESS
+    ))
+    monkeypatch.setattr(server, "score_indexes", {name: server.ScoreIndex() for name in server.SCORING.names})
+    monkeypatch.setattr(server, "weather_broadcaster", server.WeatherBroadcaster(server.SSE_QUEUE_SIZE))
+    return server
+
+
+def wait_until(condition, timeout=5.0):
+    """Poll a condition while the app's event loop works in the TestClient thread"""
+    import time
+
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.02)
@@ -0,0 +1,67 @@
+import asyncio
+
+import orjson
+from fastapi.testclient import TestClient
+
+from tests.conftest import wait_until
+
+
+def post_batch(client, **body):
+    response = client.post("/api/weather/batch", json=body, headers={"Accept-Encoding": "gzip"})
+    return response, [orjson.loads(line) for line in response.text.splitlines()]
+
+
+def test_one_line_per_beach_with_errors_for_unknown_ones(backend):
+    server = backend
+    first, second = list(server.BEACHES)[:2]
+    with TestClient(server.app) as client:
+        response, lines = post_batch(client, beaches=[first, "Atlantis", second, first, "Atlantis"])
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        # Streamed bodies are never compressed, however large
+        assert "content-encoding" not in response.headers
+        assert len(response.content) > server.GZIP_MINIMUM_SIZE
+
+        assert sorted(line["beach"] for line in lines) == sorted(["Atlantis", first, second])
+        assert next(line for line in lines if line["beach"] == "Atlantis") == {"beach": "Atlantis", "error": "Beach not found"}
+        for line in lines:
+            if line["beach"] != "Atlantis":
+                assert line["data"]["forecast"]["hourly"]["time"]
+                assert "stale" in line
+
+        _, compact = post_batch(client, beaches=[first], fields="temperature_2m", format="compact")
+        assert set(compact[0]["data"]["hourly"]) == {"time", "temperature_2m"}
+
+
+def test_bad_requests_fail_before_streaming(backend, upstream):
+    server = backend
+    beach = next(iter(server.BEACHES))
+    with TestClient(server.app) as client:
+        response, _ = post_batch(client, beaches=[beach], fields="temperature_2m,sunshine")
+        assert response.status_code == 400
+        assert "sunshine" in response.json()["detail"]
+        assert post_batch(client, beaches=[beach], format="xml")[0].status_code == 422
+        assert post_batch(client, beaches=[])[0].status_code == 422
+        assert upstream.calls == []
+
+
+def test_cached_beaches_stream_before_a_slow_upstream_chunk(backend, upstream):
+    server = backend
+    warm, *cold = list(server.BEACHES)
+    with TestClient(server.app) as client:
+        assert client.get(f"/api/weather/{warm}").status_code == 200
+        wait_until(lambda: server.marine_cache.peek(server.BEACH_CELLS[warm]) is not None)
+        upstream.delay = 0.5
+
+        async def stream():
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            response = await server.stream_weather_batch(server.WeatherBatchRequest(beaches=cold + [warm]))
+            return [(loop.time() - started, orjson.loads(line)) async for line in response.body_iterator]
+
+        arrivals = client.portal.call(stream)
+        assert [line["beach"] for _, line in arrivals][0] == warm
+        assert arrivals[0][0] < 0.25
+        assert {line["beach"] for _, line in arrivals[1:]} == set(cold)
+        assert all(elapsed >= 0.5 for elapsed, _ in arrivals[1:])
+        assert not any("error" in line for _, line in arrivals)
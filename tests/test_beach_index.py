@@ -0,0 +1,81 @@
+import random
+import time
+
+import pytest
+
+import server
+
+
+def make_beaches(rng, count, lat_range=(53.0, 55.5), lon_range=(6.0, 14.5)):
+    return {
+        f"beach-{i}": {"latitude": rng.uniform(*lat_range), "longitude": rng.uniform(*lon_range)}
+        for i in range(count)
+    }
+
+
+def brute_force(beaches, latitude, longitude, k, max_km=None):
+    distances = sorted(
+        (server.haversine_km(latitude, longitude, beach["latitude"], beach["longitude"]), beach_id)
+        for beach_id, beach in beaches.items()
+    )
+    if max_km is not None:
+        distances = [entry for entry in distances if entry[0] <= max_km]
+    return distances[:k]
+
+
+def assert_same(result, expected):
+    assert [beach_id for _, beach_id in result] == [beach_id for _, beach_id in expected]
+    assert [distance for distance, _ in result] == pytest.approx([distance for distance, _ in expected], abs=1e-6)
+
+
+@pytest.fixture
+def registry():
+    beaches = make_beaches(random.Random(13), 2000)
+    return beaches, server.BeachIndex(beaches, server.BEACH_INDEX_CELL_DEGREES)
+
+
+def test_nearest_matches_brute_force_inside_registry(registry):
+    beaches, index = registry
+    rng = random.Random(1)
+    for _ in range(300):
+        latitude, longitude = rng.uniform(53.0, 55.5), rng.uniform(6.0, 14.5)
+        k = rng.choice([1, 5, 20])
+        assert_same(index.nearest(latitude, longitude, k), brute_force(beaches, latitude, longitude, k))
+
+
+@pytest.mark.parametrize("latitude,longitude", [
+    (-90, -180), (90, 180), (0, 0), (45, 10), (54, 179.9), (54, -179.9), (60, -30), (-45, 100)
+])
+def test_nearest_matches_brute_force_outside_registry(registry, latitude, longitude):
+    beaches, index = registry
+    for k in (1, 5, 100):
+        assert_same(index.nearest(latitude, longitude, k), brute_force(beaches, latitude, longitude, k))
+
+
+def test_nearest_respects_max_km(registry):
+    beaches, index = registry
+    rng = random.Random(2)
+    for _ in range(200):
+        latitude, longitude = rng.uniform(50.0, 58.0), rng.uniform(2.0, 18.0)
+        max_km = rng.choice([1.0, 5.0, 25.0, 200.0])
+        assert_same(
+            index.nearest(latitude, longitude, 10, max_km),
+            brute_force(beaches, latitude, longitude, 10, max_km)
+        )
+    assert index.nearest(45, 10, 5, max_km=100) == []
+
+
+def test_nearest_on_registry_spanning_the_antimeridian():
+    beaches = make_beaches(random.Random(3), 500, lat_range=(-20.0, -15.0), lon_range=(-180.0, 180.0))
+    index = server.BeachIndex(beaches, server.BEACH_INDEX_CELL_DEGREES)
+    for latitude, longitude in [(-17.5, 179.95), (-17.5, -179.95), (-18.0, 0.0), (-90, 0)]:
+        assert_same(index.nearest(latitude, longitude, 5), brute_force(beaches, latitude, longitude, 5))
+
+
+def test_far_queries_stay_cheap():
+    beaches = make_beaches(random.Random(4), 20000)
+    index = server.BeachIndex(beaches, server.BEACH_INDEX_CELL_DEGREES)
+    start = time.perf_counter()
+    for latitude, longitude in [(-90, -180), (45, 10), (0, 0), (54.0, 10.0)]:
+        index.nearest(latitude, longitude, 100)
+    assert time.perf_counter() - start < 0.5
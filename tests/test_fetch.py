@@ -0,0 +1,83 @@
+import asyncio
+
+import aiohttp
+import pytest
+from fastapi import HTTPException
+
+
+def batch_calls(calls):
+    return [locations for locations in calls if locations > 1]
+
+
+@pytest.fixture
+def chunked(backend, upstream, monkeypatch):
+    """All cells in one batch, with a hook to replace the upstream answer for batched requests"""
+    server = backend
+    monkeypatch.setattr(server, "UPSTREAM_BATCH_SIZE", 50)
+    calls = []
+
+    def answer_batches(batch_answer):
+        async def fetch(url):
+            locations = url.split("latitude=")[1].split("&")[0].count(",") + 1
+            calls.append(locations)
+            if locations > 1:
+                return await batch_answer(url)
+            return await upstream.fetch(url)
+        monkeypatch.setattr(server, "fetch_upstream_json", fetch)
+
+    def fetch_all():
+        return asyncio.run(server.fetch_all_cells(list(server.CELLS)))
+
+    return server, answer_batches, fetch_all, calls
+
+
+@pytest.mark.parametrize("failure,status", [
+    (lambda: (503, None), 502),
+    (lambda: (429, None), 502),
+    (HTTPException(status_code=503, detail="circuit open"), 503),
+    (aiohttp.ClientConnectionError("connection refused"), 502),
+    (asyncio.TimeoutError(), 504)
+])
+def test_host_failures_fail_the_whole_chunk(chunked, failure, status):
+    server, answer_batches, fetch_all, calls = chunked
+
+    async def batch_answer(url):
+        if isinstance(failure, BaseException):
+            raise failure
+        return failure()
+
+    answer_batches(batch_answer)
+    results = fetch_all()
+    assert calls == [len(server.CELLS)]
+    assert all(isinstance(result, HTTPException) and result.status_code == status for result in results.values())
+
+
+def test_chunk_timeout_fails_the_whole_chunk(chunked, monkeypatch):
+    server, answer_batches, fetch_all, calls = chunked
+    monkeypatch.setattr(server, "BEACH_FETCH_TIMEOUT", 0.1)
+
+    async def batch_answer(url):
+        await asyncio.sleep(1)
+
+    answer_batches(batch_answer)
+    results = fetch_all()
+    assert calls == [len(server.CELLS)]
+    assert all(result.status_code == 504 for result in results.values())
+
+
+@pytest.mark.parametrize("answer", [
+    lambda url: (400, None),
+    lambda url: (200, [{}]),
+    lambda url: (200, "not a list of locations")
+], ids=["client error", "length mismatch", "bad body"])
+def test_batch_specific_errors_fall_back_per_cell(chunked, upstream, answer):
+    server, answer_batches, fetch_all, calls = chunked
+
+    async def batch_answer(url):
+        return answer(url)
+
+    answer_batches(batch_answer)
+    results = fetch_all()
+    assert batch_calls(calls) == [len(server.CELLS)]
+    assert len(calls) == 1 + len(server.CELLS)
+    assert not any(isinstance(result, Exception) for result in results.values())
@@ -0,0 +1,93 @@
+import asyncio
+import random
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+
+def render(data):
+    return orjson.loads(orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS))
+
+
+def upstream_forecast(seed):
+    """An Open-Meteo style response with two-decimal floats, nulls, integer variables and a short series"""
+    rng = random.Random(seed)
+    times = [f"2025-07-0{1 + hour // 24}T{hour % 24:02d}:00" for hour in range(72)]
+
+    def series(low, high, decimals=2, nulls=0.05):
+        return [None if rng.random() < nulls else round(rng.uniform(low, high), decimals) for _ in times]
+
+    hourly = {
+        "time": times,
+        "temperature_2m": series(-5, 35),
+        "relative_humidity_2m": series(20, 100, 0),
+        "apparent_temperature": series(-8, 38),
+        # Integer variables: whole numbers with gaps, whole numbers without, and one with a fractional value
+        "precipitation_probability": [int(value) if value is not None else None for value in series(0, 100, 0)],
+        "weather_code": [rng.choice([0, 1, 2, 3, 61, 95]) for _ in times],
+        "cloud_cover": [rng.randint(0, 100) for _ in times[:-1]] + [12.5],
+        "precipitation": series(0, 20, 2, nulls=0.3),
+        "wind_speed_10m": series(0, 60, 1),
+        "wind_direction_10m": series(0, 360, 0, nulls=0),
+        "uv_index": series(0, 9.5)[:30],
+        "is_day": [int(6 <= hour % 24 <= 20) for hour in range(72)]
+    }
+    hourly["relative_humidity_2m"] = [int(value) if value is not None else None for value in hourly["relative_humidity_2m"]]
+    hourly["wind_direction_10m"] = [int(value) for value in hourly["wind_direction_10m"]]
+    return {
+        "latitude": 54.38, "longitude": 13.68, "generationtime_ms": 0.71, "utc_offset_seconds": 7200,
+        "timezone": "Europe/Berlin", "elevation": 4.0,
+        "hourly_units": {"time": "iso8601", "temperature_2m": "°C"},
+        "hourly": hourly,
+        "daily": {"time": ["2025-07-01", "2025-07-02", "2025-07-03"], "weather_code": [1, 61, 3]}
+    }
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_forecast_round_trips_through_mongo(backend, seed):
+    data = upstream_forecast(seed)
+    forecast = server.Forecast.from_json(data, server.FORECAST_HOURLY_VARIABLES)
+    # Rendering gives back exactly what upstream sent: floats, nulls, integers and the short series
+    assert render(forecast.to_json()) == data
+
+    async def round_trip():
+        await backend.weather_collection.insert_one({"_id": seed, "forecast": forecast.to_document()})
+        return await backend.weather_collection.find_one({"_id": seed})
+
+    stored = server.Forecast.from_document(asyncio.run(round_trip())["forecast"], server.FORECAST_HOURLY_VARIABLES)
+    assert render(stored.to_json()) == data
+    assert stored.digest == forecast.digest
+    assert stored.hourly.integers == forecast.hourly.integers
+    assert "cloud_cover" not in stored.hourly.integers
+    assert {"weather_code", "precipitation_probability", "is_day"} <= stored.hourly.integers
+
+
+def test_legacy_raw_documents_still_decode():
+    data = upstream_forecast(9)
+    legacy = server.Forecast.from_document(data, server.FORECAST_HOURLY_VARIABLES)
+    assert render(legacy.to_json()) == data
+    assert legacy.digest == server.Forecast.from_json(data, server.FORECAST_HOURLY_VARIABLES).digest
+
+
+def test_rendered_snapshot_survives_the_mongo_cache(backend, upstream):
+    server = backend
+    # Marine data arriving would rescore the L1 profiles but not the stored copy
+    upstream.marine_available = False
+    with TestClient(server.app) as client:
+        beach = next(iter(server.BEACHES))
+        cell = server.BEACH_CELLS[beach]
+        assert client.get(f"/api/weather/{beach}").status_code == 200
+        cached = server.weather_cache.peek(cell)
+        document = client.portal.call(server.weather_collection.find_one, {"cell": cell})
+        restored = server.snapshot_from_document(document["data"])
+
+        # Mongo keeps timestamps to the millisecond; everything else comes back exactly
+        assert restored["timestamp"] == cached["timestamp"].replace(microsecond=cached["timestamp"].microsecond // 1000 * 1000)
+        assert render({**server.render_snapshot(restored), "timestamp": None}) == \
+            render({**server.render_snapshot(cached), "timestamp": None})
+        assert restored["profiles"].keys() == cached["profiles"].keys()
+        for name, scores in cached["profiles"].items():
+            assert render(restored["profiles"][name]) == render(scores)
@@ -0,0 +1,123 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+
+def snapshot(server, first_day, **variables):
+    """A forecast snapshot with hourly values from midnight of first_day on"""
+    times = [
+        (datetime.combine(first_day, datetime.min.time()) + timedelta(hours=hour)).strftime("%Y-%m-%dT%H:%M")
+        for hour in range(len(variables["temperature_2m"]))
+    ]
+    forecast = server.Forecast.from_json({"hourly": {"time": times, **variables}}, server.FORECAST_HOURLY_VARIABLES)
+    return {"forecast": forecast, "timestamp": datetime.now()}
+
+
+def as_array(values):
+    return np.array([np.nan if value is None else value for value in values], dtype=float)
+
+
+@pytest.fixture
+def history(backend):
+    """A beach whose cell has history for yesterday and today, written through history_updates"""
+    server = backend
+    beach = next(iter(server.BEACHES))
+    cell = server.BEACH_CELLS[beach]
+    today = date.today()
+    yesterday = today - timedelta(days=1)
+
+    # Three days from yesterday on with gaps; half degrees keep the values exact in float32
+    temperatures = [None if hour % 7 == 3 else hour / 2 - 3 for hour in range(72)]
+    # A short series leaves the rest of the hours empty
+    uv_index = [hour % 10 for hour in range(30)]
+    updates = server.history_updates(cell, snapshot(server, yesterday, temperature_2m=temperatures, uv_index=uv_index))
+    # Tomorrow is still a forecast and is not written
+    assert sorted(update._filter["date"] for update in updates) == [yesterday.isoformat(), today.isoformat()]
+
+    with TestClient(server.app) as client:
+        client.portal.call(server.history_collection.bulk_write, updates)
+        # A later snapshot of today replaces its temperatures in the same day document and keeps the rest
+        temperatures_today = [None if hour % 5 == 0 else 20 + hour / 2 for hour in range(24)]
+        later = server.history_updates(cell, snapshot(server, today, temperature_2m=temperatures_today))
+        client.portal.call(server.history_collection.bulk_write, later)
+
+        documents = client.portal.call(lambda: server.history_collection.find({"cell": cell}).to_list(None))
+        assert sorted(document["date"] for document in documents) == [yesterday.isoformat(), today.isoformat()]
+        stored = next(document for document in documents if document["date"] == today.isoformat())
+        np.testing.assert_array_equal(
+            np.frombuffer(stored["variables"]["temperature_2m"], dtype="<f4"), as_array(temperatures_today)
+        )
+
+        expected = {
+            "temperature_2m": as_array(temperatures[:24] + temperatures_today),
+            "uv_index": as_array(uv_index + [None] * 18)
+        }
+        yield server, client, beach, yesterday, today, expected
+
+
+def test_hourly_history_keeps_gaps(history):
+    server, client, beach, yesterday, today, expected = history
+    response = client.get(f"/api/history/{beach}", params={
+        "start": (yesterday - timedelta(days=1)).isoformat(), "end": today.isoformat(),
+        "variables": "temperature_2m,uv_index"
+    })
+    assert response.status_code == 200
+    body = response.json()
+
+    assert len(body["time"]) == 72
+    assert body["time"][24] == f"{yesterday.isoformat()}T00:00"
+    for name, values in expected.items():
+        series = body["variables"][name]
+        # The day before has no document at all
+        assert series[:24] == [None] * 24
+        assert None in series[24:]
+        np.testing.assert_array_equal(as_array(series[24:]), values)
+
+
+@pytest.mark.parametrize("aggregate,reducer", [("mean", np.nanmean), ("min", np.nanmin), ("max", np.nanmax)])
+@pytest.mark.parametrize("resolution", [3, 6, 24])
+def test_downsampled_history(history, aggregate, reducer, resolution):
+    server, client, beach, yesterday, today, expected = history
+    body = client.get(f"/api/history/{beach}", params={
+        "start": yesterday.isoformat(), "end": today.isoformat(), "variables": "temperature_2m,uv_index",
+        "resolution": resolution, "aggregate": aggregate
+    }).json()
+
+    assert body["resolution_hours"] == resolution and body["aggregate"] == aggregate
+    assert len(body["time"]) == 48 // resolution
+    assert body["time"][1] == (
+        f"{today.isoformat()}T00:00" if resolution == 24 else f"{yesterday.isoformat()}T{resolution:02d}:00"
+    )
+    for name, values in expected.items():
+        # Buckets without any value are null rather than NaN
+        reduced = [
+            None if np.isnan(bucket).all() else round(float(reducer(bucket)), 2)
+            for bucket in values.reshape(-1, resolution)
+        ]
+        assert body["variables"][name] == reduced
+
+
+def test_history_validation(history):
+    server, client, beach, yesterday, today, expected = history
+    path = f"/api/history/{beach}"
+
+    response = client.get(path, params={"resolution": 5})
+    assert response.status_code == 400 and response.json()["detail"] == "resolution must divide 24"
+    assert client.get(path, params={"resolution": 25}).status_code == 422
+    assert client.get(path, params={"aggregate": "median"}).status_code == 422
+    assert client.get(path, params={"start": "2025-1-1"}).status_code == 422
+    assert client.get(path, params={"start": "2025-02-30", "end": "2025-03-02"}).status_code == 400
+
+    # End before start, and ranges past the limit
+    assert client.get(path, params={"start": today.isoformat(), "end": yesterday.isoformat()}).status_code == 400
+    longest = today - timedelta(days=server.HISTORY_MAX_DAYS - 1)
+    assert client.get(path, params={"start": longest.isoformat(), "end": today.isoformat()}).status_code == 200
+    response = client.get(path, params={"start": (longest - timedelta(days=1)).isoformat(), "end": today.isoformat()})
+    assert response.status_code == 400
+    assert response.json()["detail"] == f"Date range must cover 1 to {server.HISTORY_MAX_DAYS} days"
+
+    response = client.get(path, params={"variables": "temperature_2m,pressure"})
+    assert response.status_code == 400 and "pressure" in response.json()["detail"]
+    assert client.get("/api/history/Atlantis").status_code == 404
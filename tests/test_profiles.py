@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+import server
+
+
+# Overlapping bands, open and closed bounds, and variables only some profiles score
+CUSTOM_PROFILES = {
+    "first": {
+        "a": [{"min": 0, "max": 10, "points": 5}, {"above": 10, "below": 20, "points": 3}, {"min": -5, "points": 1}],
+        "b": [{"below": 0.5, "points": 7}]
+    },
+    "second": {
+        "a": [{"above": 2.5, "max": 2.75, "points": 11}, {"max": 10, "points": 2}],
+        "c": [{"min": 1e-3, "max": 1e-3, "points": 4}, {"above": 1e-3, "points": 1}]
+    },
+    "empty": {}
+}
+
+
+def reference_points(profiles, name, variable, value):
+    return next((band["points"] for band in profiles[name].get(variable, []) if server.band_matches(band, value)), 0)
+
+
+def probe_values(compiled, variable, rng):
+    """Every bound, its neighbouring floats and small offsets, midpoints and random values around the bounds"""
+    bounds = compiled.bounds[variable]
+    if not len(bounds):
+        return rng.uniform(-100, 100, 50)
+    epsilon = 1e-9 * np.maximum(1, np.abs(bounds))
+    span = max(bounds[-1] - bounds[0], 1.0)
+    return np.concatenate([
+        bounds,
+        np.nextafter(bounds, -np.inf), np.nextafter(bounds, np.inf),
+        bounds - epsilon, bounds + epsilon,
+        (bounds[:-1] + bounds[1:]) / 2,
+        rng.uniform(bounds[0] - span, bounds[-1] + span, 500),
+        [-1e12, 1e12]
+    ])
+
+
+@pytest.mark.parametrize("profiles", [server.SCORING_PROFILES, CUSTOM_PROFILES], ids=["shipped", "custom"])
+def test_compiled_tables_match_band_checks(profiles):
+    compiled = server.CompiledProfiles(profiles)
+    rng = np.random.default_rng(21)
+    for variable in compiled.variables:
+        values = probe_values(compiled, variable, rng)
+        # Only this variable has values; the others are missing and score nothing
+        matrix = {name: np.full((1, len(values)), np.nan) for name in compiled.variables}
+        matrix[variable][0] = values
+        scores = compiled.score(matrix)
+        for position, name in enumerate(compiled.names):
+            expected = [reference_points(profiles, name, variable, float(value)) for value in values]
+            assert scores[position, 0].tolist() == expected, (name, variable)
+
+
+def test_compiled_scores_sum_over_variables():
+    compiled = server.SCORING
+    rng = np.random.default_rng(22)
+    matrix = {}
+    for variable in compiled.variables:
+        values = rng.choice(probe_values(compiled, variable, rng), size=(20, 48))
+        # Some hours are missing
+        values[rng.random(values.shape) < 0.1] = np.nan
+        matrix[variable] = values
+    scores = compiled.score(matrix)
+
+    for position, name in enumerate(compiled.names):
+        expected = np.zeros((20, 48))
+        for variable in compiled.variables:
+            expected += [
+                [0 if np.isnan(value) else reference_points(server.SCORING_PROFILES, name, variable, value) for value in row]
+                for row in matrix[variable].tolist()
+            ]
+        np.testing.assert_array_equal(scores[position], expected)
@@ -0,0 +1,55 @@
+from fastapi.testclient import TestClient
+
+from tests.conftest import wait_until
+
+
+def test_marine_profile_loads_marine_data(backend, upstream):
+    server = backend
+    with TestClient(server.app) as client:
+        assert client.get("/api/weather", params={"fields": "temperature_2m"}).status_code == 200
+        assert "marine" not in upstream.calls
+
+        first = client.get("/api/recommendations", params={"profile": "swim"}).json()
+        assert first["marine_pending"] == len(server.BEACHES)
+        assert all(entry.get("marine_pending") for entry in first["recommendations"])
+
+        wait_until(lambda: client.get("/api/recommendations", params={"profile": "swim"}).json()["marine_pending"] == 0)
+        ranked = client.get("/api/recommendations", params={"profile": "swim"}).json()["recommendations"]
+        assert not any(entry.get("marine_pending") for entry in ranked)
+
+        for entry in ranked:
+            cell = server.BEACH_CELLS[entry["beach"]]
+            expected = server.calculate_beach_scores(
+                [server.weather_cache.peek(cell)["forecast"]], [server.marine_cache.peek(cell)["marine"]]
+            )[0]["profiles"]["swim"]["beach_score"]
+            assert entry["score"] == expected
+
+        # Profiles without marine bands never touch the marine API
+        calls = upstream.calls.count("marine")
+        assert client.get("/api/recommendations").json()["marine_pending"] == 0
+        assert upstream.calls.count("marine") == calls
+
+
+def test_cold_worker_waits_for_initial_load(backend, upstream):
+    server = backend
+    with TestClient(server.app) as client:
+        body = client.get("/api/recommendations").json()
+        assert body["pending"] == 0
+        assert body["total"] == len(server.BEACHES)
+        assert upstream.calls.count("forecast") == 1
+
+
+def test_cold_worker_reports_pending_beaches(backend, upstream, monkeypatch):
+    server = backend
+    monkeypatch.setattr(server, "RECOMMENDATIONS_WARMUP_WAIT", 0.1)
+    upstream.delay = 1.0
+    with TestClient(server.app) as client:
+        body = client.get("/api/recommendations").json()
+        assert body["recommendations"] == []
+        assert body["pending"] == len(server.BEACHES)
+
+        # Further requests join the same load instead of starting another
+        assert client.get("/api/recommendations").json()["pending"] == len(server.BEACHES)
+        wait_until(lambda: client.get("/api/recommendations").json()["pending"] == 0)
+        assert client.get("/api/recommendations").json()["total"] == len(server.BEACHES)
+        assert upstream.calls.count("forecast") == 1
@@ -0,0 +1,107 @@
+import time
+from datetime import timedelta
+from email.utils import format_datetime, parsedate_to_datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from tests.conftest import wait_until
+
+
+def drain(queue):
+    events = []
+    while not queue.empty():
+        events.append(queue.get_nowait())
+    return events
+
+
+def test_adopted_snapshots_publish_only_changed_forecasts(backend, upstream):
+    server = backend
+    with TestClient(server.app) as client:
+        assert client.get("/api/weather", params={"fields": "temperature_2m"}).status_code == 200
+        cell = next(iter(server.CELLS))
+        queue = server.weather_broadcaster.subscribe(None)
+
+        def written_by_other_worker():
+            # Another worker's refresh lands in Mongo without passing through this worker's L1
+            data = client.portal.call(server.fetch_all_cells, [cell])[cell]
+            client.portal.call(server.weather_collection.replace_one, {"cell": cell}, server.cache_document(cell, data))
+            return data
+
+        # Same forecast under a newer timestamp: adopted silently
+        written_by_other_worker()
+        client.portal.call(server.refresh_cells, [cell])
+        assert drain(queue) == []
+
+        # A new model run: adopted and pushed to every beach in the cell
+        upstream.start += timedelta(hours=1)
+        data = written_by_other_worker()
+        client.portal.call(server.refresh_cells, [cell])
+        adopted = server.weather_cache.peek(cell)
+        assert adopted["forecast"].digest == data["forecast"].digest
+        events = drain(queue)
+        assert len(events) == len(server.CELL_BEACHES[cell])
+        assert all(f"@{adopted['timestamp'].isoformat()}".encode() in event for event in events)
+        # Adopting it was this worker's refresh, so nothing was fetched on top
+        assert upstream.calls.count("forecast") == 3
+
+
+def test_validators_follow_content_not_refresh_time(backend, upstream):
+    server = backend
+    with TestClient(server.app) as client:
+        beach = next(iter(server.BEACHES))
+        cell = server.BEACH_CELLS[beach]
+        first = client.get(f"/api/weather/{beach}")
+        assert first.status_code == 200
+        wait_until(lambda: server.marine_cache.peek(cell) is not None)
+        first = client.get(f"/api/weather/{beach}")
+        listing = client.get("/api/weather")
+        timestamp = server.weather_cache.peek(cell)["timestamp"]
+
+        # The same forecast and marine data come back
+        client.portal.call(server.refresh_cells, [cell])
+        client.portal.call(server.refresh_marine, [cell])
+        assert server.weather_cache.peek(cell)["timestamp"] > timestamp
+        again = client.get(f"/api/weather/{beach}")
+        assert again.headers["ETag"] == first.headers["ETag"]
+        assert again.headers["Last-Modified"] == first.headers["Last-Modified"]
+        assert client.get("/api/weather").headers["ETag"] == listing.headers["ETag"]
+        revalidated = client.get(f"/api/weather/{beach}", headers={"If-None-Match": first.headers["ETag"]})
+        assert revalidated.status_code == 304
+        since = client.get(f"/api/weather/{beach}", headers={"If-Modified-Since": first.headers["Last-Modified"]})
+        assert since.status_code == 304
+
+        # A new model run changes both validators
+        upstream.start += timedelta(hours=1)
+        time.sleep(1.1)
+        client.portal.call(server.refresh_cells, [cell])
+        changed = client.get(f"/api/weather/{beach}", headers={"If-None-Match": first.headers["ETag"]})
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != first.headers["ETag"]
+        assert changed.headers["Last-Modified"] != first.headers["Last-Modified"]
+        assert client.get("/api/weather").headers["ETag"] != listing.headers["ETag"]
+
+
+@pytest.mark.parametrize("style", ["rfc1123", "rfc850", "asctime", "no zone"])
+def test_if_modified_since_accepts_every_http_date_format(backend, style):
+    server = backend
+
+    def http_date(moment):
+        if style == "rfc1123":
+            return format_datetime(moment, usegmt=True)
+        if style == "rfc850":
+            return moment.strftime("%A, %d-%b-%y %H:%M:%S GMT")
+        if style == "asctime":
+            return moment.strftime("%a %b ") + f"{moment.day:2d}" + moment.strftime(" %H:%M:%S %Y")
+        return moment.strftime("%a, %d %b %Y %H:%M:%S -0000")
+
+    with TestClient(server.app) as client:
+        beach = next(iter(server.BEACHES))
+        for path in (f"/api/weather/{beach}", "/api/weather"):
+            first = client.get(path)
+            assert first.status_code == 200
+            modified = parsedate_to_datetime(first.headers["Last-Modified"])
+            unchanged = client.get(path, headers={"If-Modified-Since": http_date(modified)})
+            assert unchanged.status_code == 304
+            earlier = client.get(path, headers={"If-Modified-Since": http_date(modified - timedelta(hours=1))})
+            assert earlier.status_code == 200
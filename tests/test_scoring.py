@@ -0,0 +1,182 @@
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import server
+
+
+def frozen_recommendation(forecast_data):
+    """The per-hour scoring loop calculate_beach_scores replaced, kept as the reference"""
+    hourly_temps = forecast_data["hourly"]["temperature_2m"]
+    hourly_precip = forecast_data["hourly"]["precipitation_probability"]
+    hourly_uv = forecast_data["hourly"]["uv_index"]
+    hourly_clouds = forecast_data["hourly"]["cloud_cover"]
+    hourly_wind = forecast_data["hourly"]["wind_speed_10m"]
+    hourly_times = forecast_data["hourly"]["time"]
+
+    best_score = 0
+    best_time = None
+
+    for i, time_str in enumerate(hourly_times[:24]):
+        hour = datetime.fromisoformat(time_str.replace('Z', '+00:00')).hour
+
+        if 6 <= hour <= 20:
+            temp = hourly_temps[i] if i < len(hourly_temps) else 15
+            precip = hourly_precip[i] if i < len(hourly_precip) else 100
+            uv = hourly_uv[i] if i < len(hourly_uv) else 10
+            clouds = hourly_clouds[i] if i < len(hourly_clouds) else 100
+            wind = hourly_wind[i] if i < len(hourly_wind) else 30
+
+            score = 0
+
+            if 20 <= temp <= 28:
+                score += 30
+            elif 18 <= temp <= 32:
+                score += 20
+            elif 15 <= temp <= 35:
+                score += 10
+
+            if precip <= 10:
+                score += 25
+            elif precip <= 30:
+                score += 15
+            elif precip <= 50:
+                score += 5
+
+            if 3 <= uv <= 6:
+                score += 20
+            elif 1 <= uv <= 8:
+                score += 15
+            elif uv < 1:
+                score += 5
+
+            if clouds <= 30:
+                score += 15
+            elif clouds <= 60:
+                score += 10
+            elif clouds <= 80:
+                score += 5
+
+            if 5 <= wind <= 15:
+                score += 10
+            elif wind <= 25:
+                score += 5
+
+            if score > best_score:
+                best_score = score
+                best_time = time_str
+
+    if best_time:
+        best_time = datetime.fromisoformat(best_time.replace('Z', '+00:00')).strftime("%H:%M")
+
+    return best_time, round(best_score, 1)
+
+
+# Value ranges, plus the band edges where an off-by-one would show
+RANDOM_VARIABLES = {
+    "temperature_2m": (10, 36, [15, 18, 19.99, 20, 28, 28.01, 32, 35]),
+    "precipitation_probability": (0, 100, [10, 30, 50]),
+    "uv_index": (0, 10, [0.99, 1, 2.99, 3, 6, 8, 8.01]),
+    "cloud_cover": (0, 100, [30, 60, 80]),
+    "wind_speed_10m": (0, 30, [4.99, 5, 15, 25, 25.01])
+}
+
+
+def random_forecast(rng):
+    start = datetime(2025, rng.choice([3, 6, 10]), rng.randint(1, 28), rng.randint(0, 23))
+    hours = rng.choice([72, 72, 72, rng.randint(0, 72)])
+    hourly = {"time": [(start + timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M") for i in range(hours)]}
+    for name, (low, high, edges) in RANDOM_VARIABLES.items():
+        hourly[name] = [
+            round(rng.choice([rng.uniform(low, high), float(rng.randint(low, high)), low, high, rng.choice(edges)]), 2)
+            for _ in range(hours)
+        ]
+    # Short series fall back to the loop's defaults for the missing hours
+    if rng.random() < 0.1:
+        name = rng.choice(list(RANDOM_VARIABLES))
+        hourly[name] = hourly[name][:rng.randint(0, 30)]
+    return {"latitude": 54.0, "longitude": 13.0, "hourly": hourly}
+
+
+def test_scores_match_the_per_hour_loop():
+    rng = random.Random(7)
+    forecasts = [random_forecast(rng) for _ in range(3000)]
+    mismatches = []
+    # Batches mix forecasts of different lengths in one scoring matrix
+    for first in range(0, len(forecasts), 250):
+        batch = forecasts[first:first + 250]
+        results = server.calculate_beach_scores(
+            [server.Forecast.from_json(data, server.FORECAST_HOURLY_VARIABLES) for data in batch]
+        )
+        for data, result in zip(batch, results):
+            if (result["best_time"], result["beach_score"]) != frozen_recommendation(data):
+                mismatches.append((data["hourly"]["time"][:1], result["best_time"], result["beach_score"]))
+    assert mismatches == []
+
+
+def hour_grid(start, hours):
+    times = np.arange(np.datetime64(start, "h"), np.datetime64(start, "h") + hours).reshape(1, -1)
+    return times, server.daytime_mask(times, np.ones(times.shape, dtype=bool))
+
+
+def windows_brute_force(times, daytime, scores, window_hours):
+    """Best all-daytime window per day by trying every start"""
+    best = {}
+    for start in range(scores.shape[1] - window_hours + 1):
+        if not daytime[0, start:start + window_hours].all():
+            continue
+        day = str(times[0, start].astype("datetime64[D]"))
+        total = scores[0, start:start + window_hours].sum()
+        if day not in best or total > best[day][1]:
+            best[day] = (start, total)
+    return [
+        {
+            "date": day,
+            "start": np.datetime_as_string(times[0, start], unit="m")[11:16],
+            "end": np.datetime_as_string(times[0, start] + np.timedelta64(window_hours, "h"), unit="m")[11:16],
+            "score": round(float(total) / window_hours, 1)
+        }
+        for day, (start, total) in sorted(best.items())
+    ]
+
+
+def test_windows_do_not_cross_day_boundaries():
+    times, daytime = hour_grid("2025-07-01T15", 24)
+    scores = np.zeros((1, 24))
+    # Best hours run from the evening of the first day into the next morning
+    for hour in ("2025-07-01T19", "2025-07-01T20", "2025-07-01T21", "2025-07-01T22", "2025-07-02T06"):
+        scores[0, int((np.datetime64(hour, "h") - times[0, 0]).astype(int))] = 90
+
+    windows = server.find_best_windows(times, daytime, scores, 3)[0]
+    assert windows == [
+        {"date": "2025-07-01", "start": "18:00", "end": "21:00", "score": 60.0},
+        {"date": "2025-07-02", "start": "06:00", "end": "09:00", "score": 30.0}
+    ]
+
+
+@pytest.mark.parametrize("window_hours", [1, 3, 14, 15, 16, 24, 80])
+def test_windows_match_brute_force(window_hours):
+    rng = np.random.default_rng(window_hours)
+    for start in ("2025-07-01T00", "2025-07-01T05", "2025-07-01T13", "2025-03-30T20"):
+        times, daytime = hour_grid(start, 72)
+        scores = rng.integers(0, 101, size=(1, 72)).astype(float)
+        assert server.find_best_windows(times, daytime, scores, window_hours)[0] == \
+            windows_brute_force(times, daytime, scores, window_hours)
+
+
+def test_windows_longer_than_daytime():
+    times, daytime = hour_grid("2025-07-01T00", 72)
+    scores = np.full((1, 72), 50.0)
+    # 06:00 to 20:00 inclusive is the whole 15 hour daytime span
+    assert [window["start"] for window in server.find_best_windows(times, daytime, scores, 15)[0]] == ["06:00"] * 3
+    assert server.find_best_windows(times, daytime, scores, 16) == [[]]
+    assert server.find_best_windows(times, daytime, scores, 73) == [[]]
+    assert server.calculate_snapshot_windows(
+        {"forecast": server.Forecast.from_json(
+            {"hourly": {"time": np.datetime_as_string(times[0], unit="m").tolist(), "temperature_2m": [24.0] * 72}},
+            server.FORECAST_HOURLY_VARIABLES
+        ), "hourly_scores": scores[0].tolist()},
+        16
+    ) == []
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+
+def test_concurrent_spans_of_a_stage_count_once():
+    async def span(stage, seconds):
+        with server.timed(stage):
+            await asyncio.sleep(seconds)
+
+    async def scenario():
+        timings = server.StageTimings()
+        server.request_timings.set(timings)
+        # Overlapping spans: 0-100 ms and 50-150 ms
+        await asyncio.gather(span("load", 0.1), asyncio.sleep(0.05))
+        await asyncio.gather(span("upstream", 0.1), span("upstream", 0.1), span("upstream", 0.05))
+        # Separate spans still add up
+        await span("decode", 0.02)
+        await span("decode", 0.02)
+        return timings
+
+    timings = asyncio.run(scenario())
+    assert timings["upstream"] == pytest.approx(100, abs=30)
+    assert timings["decode"] == pytest.approx(40, abs=20)
+    assert not any(timings.open.values())
+
+
+def server_timing(response):
+    return {
+        entry.split(";dur=")[0].strip(): float(entry.split(";dur=")[1])
+        for entry in response.headers["Server-Timing"].split(",")
+    }
+
+
+def test_no_stage_outlasts_the_request(backend, upstream):
+    upstream.delay = 0.05
+    with TestClient(backend.app) as client:
+        beach = next(iter(backend.BEACHES))
+        # A cold beach loads forecast and marine data concurrently
+        timings = server_timing(client.get(f"/api/weather/{beach}"))
+        assert "load" in timings
+        assert all(duration <= timings["total"] for duration in timings.values())
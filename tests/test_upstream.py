@@ -0,0 +1,147 @@
+import asyncio
+
+import pytest
+
+import server
+
+
+class FakeResponse:
+    def __init__(self, status, data=None, delay=0.0):
+        self.status = status
+        self.data = data
+        self.delay = delay
+
+    async def __aenter__(self):
+        await asyncio.sleep(self.delay)
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def json(self):
+        return self.data
+
+
+class FakeSession:
+    """Stands in for the shared aiohttp session, answering from a list of responses"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def get(self, url, timeout=None):
+        self.calls += 1
+        return self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    server.circuit_breakers.clear()
+    server.rate_limiters.clear()
+    monkeypatch.setattr(server, "UPSTREAM_RATE_LIMIT", 0)
+    monkeypatch.setattr(server, "UPSTREAM_BACKOFF_BASE", 0)
+
+    def use(session):
+        monkeypatch.setattr(server, "get_http_session", lambda: session)
+        return session
+
+    yield use
+    server.circuit_breakers.clear()
+    server.rate_limiters.clear()
+
+
+def test_breaker_closed_open_half_open_closed(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(server.time, "monotonic", lambda: now[0])
+    breaker = server.CircuitBreaker(failure_threshold=2, reset_timeout=30)
+
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    now[0] += 30
+    assert breaker.allow()
+    assert breaker.state == "half-open"
+    # Only one probe at a time
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_failed_probe_reopens(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(server.time, "monotonic", lambda: now[0])
+    breaker = server.CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    now[0] += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+
+def test_cancelled_probe_does_not_wedge_breaker(upstream, monkeypatch):
+    url = "https://upstream.test/v1/forecast"
+    breaker = server.circuit_breakers.setdefault(
+        "upstream.test", server.CircuitBreaker(server.CIRCUIT_FAILURE_THRESHOLD, reset_timeout=0.05)
+    )
+    for _ in range(server.CIRCUIT_FAILURE_THRESHOLD):
+        breaker.record_failure()
+    assert breaker.state == "open"
+
+    async def scenario():
+        await asyncio.sleep(0.06)
+        # The probe hangs and the caller's timeout cancels it
+        upstream(FakeSession(FakeResponse(200, {}, delay=10)))
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(server.fetch_upstream_json(url), timeout=0.05)
+        assert not breaker.probing
+        assert breaker.state == "open"
+
+        # Once the upstream is back, the next probe closes the breaker again
+        await asyncio.sleep(0.06)
+        upstream(FakeSession(FakeResponse(200, {"ok": True})))
+        assert await server.fetch_upstream_json(url) == (200, {"ok": True})
+        assert breaker.state == "closed"
+
+    asyncio.run(scenario())
+
+
+def test_retries_stop_within_deadline(upstream, monkeypatch):
+    monkeypatch.setattr(server, "UPSTREAM_DEADLINE", 0.3)
+    monkeypatch.setattr(server, "UPSTREAM_CONNECT_TIMEOUT", 0.05)
+    monkeypatch.setattr(server, "UPSTREAM_RETRIES", 10)
+    session = upstream(FakeSession(FakeResponse(503, delay=0.1)))
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        assert await server.fetch_upstream_json("https://upstream.test/v1/forecast") == (503, None)
+        return loop.time() - started
+
+    elapsed = asyncio.run(scenario())
+    assert elapsed < 0.45
+    assert session.calls < 11
+
+
+def test_budget_spent_in_rate_limiter_sends_nothing(upstream, monkeypatch):
+    monkeypatch.setattr(server, "UPSTREAM_DEADLINE", 0.1)
+    session = upstream(FakeSession(FakeResponse(200, {"ok": True}, delay=10)))
+
+    class SlowLimiter:
+        async def acquire(self):
+            await asyncio.sleep(0.15)
+
+    server.rate_limiters["upstream.test"] = SlowLimiter()
+
+    async def scenario():
+        # Without the check the request would go out with no total timeout and hang
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(server.fetch_upstream_json("https://upstream.test/v1/forecast"), timeout=2)
+
+    asyncio.run(scenario())
+    assert session.calls == 0
+    breaker = server.circuit_breakers["upstream.test"]
+    assert breaker.state == "closed" and breaker.failures == 0
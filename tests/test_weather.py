@@ -0,0 +1,18 @@
+from fastapi.testclient import TestClient
+
+
+def test_default_shape_leaves_out_internal_fields(backend):
+    server = backend
+    with TestClient(server.app) as client:
+        beach = next(iter(server.BEACHES))
+        for params in ({}, {"format": "compact"}, {"fields": "temperature_2m,best_windows"}):
+            data = client.get(f"/api/weather/{beach}", params=params).json()["data"]
+            assert not {"profiles", "cell", "modified_at"} & set(data), params
+            listing = client.get("/api/weather", params=params).json()
+            assert not any({"profiles", "cell", "modified_at"} & set(entry) for entry in listing.values()), params
+        assert "hourly_scores" in client.get(f"/api/weather/{beach}").json()["data"]
+
+        for params in ({"fields": "profiles"}, {"fields": "profiles", "format": "compact"}):
+            profiles = client.get(f"/api/weather/{beach}", params=params).json()["data"]["profiles"]
+            assert set(profiles) == set(server.SCORING.names)
+            assert len(profiles["swim"]["hourly_scores"]) == len(client.get(f"/api/weather/{beach}").json()["data"]["hourly_scores"])